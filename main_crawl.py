@@ -2,13 +2,23 @@ import os
 import json
 import time
 import random
+import queue
 import logging
+import shutil
+import hashlib
+import tempfile
+import threading
+import argparse
 import requests
-from urllib.parse import urljoin
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin, urlparse
+from bs4 import BeautifulSoup
 from seleniumbase import SB
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 로깅 설정
 logging.basicConfig(
@@ -17,8 +27,337 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/138.0.7204.97 Safari/537.36"
+)
+TABLE_SELECTOR = "#contentarea_left > div.box_type_m > table.type_1"
+BLOCKED_STATUS_CODES = (403, 429, 503)  # 봇 탐지/차단으로 판단하는 응답 코드
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)  # 대기 후 재시도할 응답 코드
+PDF_MAGIC = b"%PDF-"
+PDF_CHUNK_SIZE = 64 * 1024
+DEFAULT_CATEGORIES = ("시황정보 리포트", "투자정보 리포트", "종목분석 리포트", "산업분석 리포트")
+OUTPUT_FORMATS = ("json", "jsonl", "parquet")
+
+def iter_report_shards(output_dir, category, start_month=None, end_month=None, columns=None):
+    """
+    카테고리별 월 단위 JSONL 샤드에서 레코드를 스트리밍으로 읽습니다.
+    필요한 월의 샤드 파일만 열고, columns 지정 시 해당 컬럼만 반환합니다.
+
+    Args:
+        output_dir (str): 크롤러 output_dir
+        category (str): 카테고리명 (예: "종목분석 리포트")
+        start_month (str): 시작 월 "YYYY-MM" (포함)
+        end_month (str): 종료 월 "YYYY-MM" (포함)
+        columns (list|tuple): 반환할 컬럼명
+    """
+    category_dir = os.path.join(output_dir, category.replace(" ", "_"))
+    if not os.path.isdir(category_dir):
+        return
+    for shard in sorted(os.listdir(category_dir)):
+        if not shard.endswith(".jsonl"):
+            continue
+        month = shard[:-len(".jsonl")]
+        if month != "unknown" and ((start_month and month < start_month) or (end_month and month > end_month)):
+            continue
+        with open(os.path.join(category_dir, shard), 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                yield {k: record.get(k) for k in columns} if columns else record
+
+class RateLimiter:
+    """호스트별 토큰 버킷 요청 속도 제한기 (여러 스레드가 공유)"""
+    def __init__(self, rate=2.0, burst=2, host_rates=None):
+        """
+        Args:
+            rate (float): 호스트별 기본 초당 요청 수
+            burst (int): 순간적으로 허용하는 최대 연속 요청 수
+            host_rates (dict): {호스트: 초당 요청 수} 호스트별 개별 설정
+        """
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = dict(host_rates) if host_rates else {}
+        self.buckets = {}  # 호스트 -> (남은 토큰, 마지막 갱신 시각)
+        self.lock = threading.Lock()
+
+    def get_rate(self, host):
+        return self.host_rates.get(host, self.rate)
+
+    def set_rate(self, host, rate):
+        with self.lock:
+            self.host_rates[host] = rate
+
+    def acquire(self, url):
+        """해당 URL 호스트의 토큰을 얻을 때까지 대기합니다."""
+        host = urlparse(url).netloc
+        while True:
+            with self.lock:
+                rate = self.get_rate(host)
+                now = time.monotonic()
+                tokens, updated = self.buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * rate)
+                if tokens >= 1:
+                    self.buckets[host] = (tokens - 1, now)
+                    return
+                self.buckets[host] = (tokens, now)
+                wait = (1 - tokens) / rate
+            time.sleep(wait)
+
+class RetryableHTTPError(Exception):
+    """재시도 대상 HTTP 응답 (429, 5xx)"""
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class AdaptiveThrottle:
+    """
+    호스트별 응답 코드/지연 시간을 측정해 RateLimiter 속도를 조절합니다.
+    정상 응답이 이어지면 속도를 조금씩 올리고, 차단(403/429)/5xx/타임아웃 시 속도를 절반으로 줄이고
+    연속 실패 횟수에 따라 지수적으로 대기합니다.
+    """
+    def __init__(self, limiter, min_rate=0.2, max_rate=8.0, increase=0.05, slow_latency=3.0, max_backoff=60.0, report_every=200):
+        """
+        Args:
+            limiter (RateLimiter): 속도를 조절할 제한기
+            min_rate (float): 최소 초당 요청 수
+            max_rate (float): 최대 초당 요청 수 (limiter에 호스트별 속도가 지정된 호스트는 그 속도가 상한)
+            increase (float): 정상 응답 1회당 증가시킬 초당 요청 수
+            slow_latency (float): 평균 응답 시간(초)이 이 값을 넘으면 속도를 조금 낮춤
+            max_backoff (float): 최대 대기 시간(초)
+            report_every (int): 이 요청 수마다 상태를 로그에 기록
+        """
+        self.limiter = limiter
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.host_max_rates = dict(limiter.host_rates)  # 설정된 호스트별 속도를 넘지 않도록 상한으로 보관
+        self.increase = increase
+        self.slow_latency = slow_latency
+        self.max_backoff = max_backoff
+        self.report_every = report_every
+        self.stats = {}  # 호스트 -> 카운터
+        self.cooldown_until = {}  # 호스트 -> 대기 종료 시각
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        """백오프 대기 중이면 기다린 뒤 속도 제한 토큰을 얻습니다."""
+        host = urlparse(url).netloc
+        with self.lock:
+            wait = self.cooldown_until.get(host, 0) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self.limiter.acquire(url)
+
+    def record(self, url, status_code=None, elapsed=0.0, retry_after=None):
+        """
+        요청 결과를 반영합니다.
+
+        Args:
+            status_code (int): 응답 코드 (연결 실패/타임아웃은 None)
+            elapsed (float): 응답 시간(초)
+            retry_after (str|float): Retry-After 헤더 값
+        """
+        host = urlparse(url).netloc
+        with self.lock:
+            st = self.stats.setdefault(host, {"requests": 0, "errors": 0, "throttled": 0, "consecutive_failures": 0, "avg_latency": None})
+            st["requests"] += 1
+            st["avg_latency"] = elapsed if st["avg_latency"] is None else 0.8 * st["avg_latency"] + 0.2 * elapsed
+            rate = self.limiter.get_rate(host)
+
+            if status_code is None or status_code in BLOCKED_STATUS_CODES or status_code >= 500:
+                st["errors"] += 1
+                if status_code in (403, 429):
+                    st["throttled"] += 1
+                st["consecutive_failures"] += 1
+                rate = max(self.min_rate, rate * 0.5)
+                backoff = min(self.max_backoff, 2 ** (st["consecutive_failures"] - 1)) * random.uniform(0.75, 1.25)
+                try:
+                    backoff = max(backoff, float(retry_after)) if retry_after is not None else backoff
+                except ValueError:
+                    pass  # HTTP 날짜 형식은 무시
+                self.cooldown_until[host] = time.monotonic() + backoff
+                logging.warning(f"{host} 응답 이상 (HTTP {status_code}). 속도 {rate:.2f}/s, {backoff:.1f}초 대기")
+            else:
+                st["consecutive_failures"] = 0
+                if st["avg_latency"] > self.slow_latency:
+                    rate = max(self.min_rate, rate * 0.9)
+                else:
+                    rate = min(self.host_max_rates.get(host, self.max_rate), rate + self.increase)
+            self.limiter.set_rate(host, rate)
+            report = st["requests"] % self.report_every == 0
+
+        if report:
+            logging.info(f"요청 상태 {host}: {self.snapshot().get(host)}")
+
+    def snapshot(self):
+        """호스트별 현재 속도와 카운터를 반환합니다."""
+        with self.lock:
+            return {
+                host: dict(st, rate=round(self.limiter.get_rate(host), 3),
+                           error_rate=round(st["errors"] / st["requests"], 3) if st["requests"] else 0.0)
+                for host, st in self.stats.items()
+            }
+
+class PdfStore:
+    """
+    SHA-256 콘텐츠 주소 기반 PDF 저장소.
+    같은 내용의 PDF는 한 번만 저장하고, (카테고리, 제목, 작성일, URL) -> 해시 매핑과
+    URL별 ETag/Last-Modified를 index.jsonl에 추가 기록합니다.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_file = os.path.join(root, "index.jsonl")
+        self.by_url = {}  # URL -> 최신 인덱스 항목
+        self.by_ref = {}  # (카테고리, 제목, 작성일, URL) -> 해시
+        self.lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.load_index()
+
+    def load_index(self):
+        if not os.path.exists(self.index_file):
+            return
+        with open(self.index_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 기록 도중 중단되어 잘린 줄
+                self.by_url[entry["url"]] = entry
+                self.by_ref[(entry["category"], entry["title"], entry["date"], entry["url"])] = entry["sha256"]
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    def lookup_url(self, url):
+        """URL로 마지막 저장 정보를 조회합니다. 없으면 None"""
+        with self.lock:
+            return self.by_url.get(url)
+
+    def new_temp_file(self):
+        """저장소와 같은 파일시스템에 임시 파일을 만듭니다. Returns: (fd, 경로)"""
+        return tempfile.mkstemp(suffix=".part", dir=self.objects_dir)
+
+    def put(self, tmp_path, sha256):
+        """검증된 임시 파일을 해시 경로로 옮깁니다. 이미 같은 내용이 있으면 임시 파일만 삭제합니다."""
+        object_path = self.object_path(sha256)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        # 크기가 다르면 기존 객체가 잘린 것이므로 새로 받은 파일로 교체
+        if os.path.exists(object_path) and os.path.getsize(object_path) == os.path.getsize(tmp_path):
+            os.remove(tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)  # mkstemp 기본 권한(0600) 대신 일반 파일 권한
+            os.replace(tmp_path, object_path)
+        return object_path
+
+    def record(self, category, title, date, url, sha256, etag=None, last_modified=None):
+        """(카테고리, 제목, 작성일, URL) -> 해시 매핑을 기록합니다."""
+        entry = {"category": category, "title": title, "date": date, "url": url, "sha256": sha256,
+                 "etag": etag, "last_modified": last_modified}
+        ref = (category, title, date, url)
+        with self.lock:
+            unchanged = self.by_ref.get(ref) == sha256 and self.by_url.get(url, {}).get("etag") == etag
+            self.by_url[url] = entry
+            self.by_ref[ref] = sha256
+            if unchanged:
+                return
+            with open(self.index_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def link(self, sha256, link_path):
+        """저장소 객체를 사람이 읽을 수 있는 경로로 연결합니다. (하드링크, 불가 시 복사)"""
+        if os.path.exists(link_path):
+            if os.path.getsize(link_path) == os.path.getsize(self.object_path(sha256)):
+                return link_path
+            os.remove(link_path)  # 교체 전의 잘린 객체에 연결된 경로
+        try:
+            os.link(self.object_path(sha256), link_path)
+        except FileExistsError:
+            pass  # 다른 워커가 먼저 연결
+        except OSError:
+            shutil.copyfile(self.object_path(sha256), link_path)
+        return link_path
+
+class PdfDownloadPool:
+    """페이지 순회와 분리되어 큐로 전달받은 PDF를 병렬 다운로드하는 워커 풀"""
+    def __init__(self, download_fn, num_workers=8, queue_size=256):
+        """
+        Args:
+            download_fn: (pdf_url, category, title, date) -> 레코드에 반영할 dict 또는 None
+            num_workers (int): 다운로드 워커 수
+            queue_size (int): 대기 작업 최대 개수 (가득 차면 페이지 순회가 대기)
+        """
+        self.download_fn = download_fn
+        self.num_workers = num_workers
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.workers = []
+        self.completed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        """워커 스레드를 시작합니다."""
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._work, name=f"pdf-download-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def submit(self, row_data, category):
+        """레코드의 PDF 다운로드 작업을 등록합니다. 완료 시 PDF_local_path, PDF_sha256이 채워집니다."""
+        # 워커가 update()로 키를 추가하면 체크포인트 압축(json.dump)과 충돌하므로 키를 미리 만들어 둠
+        row_data["PDF_local_path"] = None
+        row_data["PDF_sha256"] = None
+        self.jobs.put((row_data, category))
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    return
+                row_data, category = job
+                result = self.download_fn(row_data["PDF"], category, row_data["제목"], row_data["작성일"])
+                if result:
+                    row_data.update(result)
+                with self.lock:
+                    if result:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+            except Exception as e:
+                logging.error(f"PDF 다운로드 작업 중 에러: {e}")
+                with self.lock:
+                    self.failed += 1
+            finally:
+                self.jobs.task_done()
+
+    def join(self):
+        """등록된 모든 다운로드 작업이 끝날 때까지 대기합니다."""
+        self.jobs.join()
+        print(f"PDF 다운로드 완료: 성공 {self.completed}개, 실패 {self.failed}개")
+        logging.info(f"PDF 다운로드 완료: 성공 {self.completed}개, 실패 {self.failed}개")
+
+    def shutdown(self):
+        """워커 스레드를 종료합니다."""
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+
 class NaverPaySecuritiesCrawler:
-    def __init__(self):
+    def __init__(self, fetch_mode="http", download_workers=8, incremental=False, categories=None, request_rate=2.0, host_rates=None, output_formats=("json",)):
+        """
+        Args:
+            fetch_mode (str): "http" - 세션 기반 HTTP 요청 (봇 탐지 시 브라우저로 전환)
+                              "browser" - SeleniumBase 브라우저만 사용
+            download_workers (int): PDF 다운로드 워커 수
+            incremental (bool): True 시 1페이지부터 이미 수집된 구간에 닿을 때까지만 수집 (신규 리포트만)
+            categories (list|tuple): 수집할 카테고리명 (기본값: DEFAULT_CATEGORIES)
+            request_rate (float): 호스트별 초당 요청 수 (모든 카테고리/다운로드가 공유)
+            host_rates (dict): {호스트: 초당 요청 수} 호스트별 개별 요청 속도
+            output_formats (list|tuple): 결과 저장 형식 - "json" (단일 파일), "jsonl" (카테고리/월별 샤드), "parquet" (카테고리별)
+        """
         self.base_url = "https://finance.naver.com"
         self.categories = {
             "시황정보 리포트": "/research/market_info_list.naver",
@@ -28,33 +367,198 @@ class NaverPaySecuritiesCrawler:
             "경제분석 리포트": "/research/economy_list.naver",
             "채권분석 리포트": "/research/debenture_list.naver"
         }
-        self.checkpoint_file = "crawler_checkpoint.json"
+        self.target_categories = list(categories) if categories is not None else list(DEFAULT_CATEGORIES)
+        unknown = [cat for cat in self.target_categories if cat not in self.categories]
+        if unknown:
+            raise ValueError(f"지원하지 않는 카테고리: {unknown}")
+        self.checkpoint_lock = threading.RLock()
+        self.checkpoint_file = "crawler_checkpoint.json"  # 압축된 스냅샷
+        self.checkpoint_log = "crawler_checkpoint.jsonl"  # 페이지별 추가 기록
+        self.compact_every = 50  # 로그에 기록된 페이지 수가 이 값에 도달하면 스냅샷으로 압축
+        self.log_pages = 0
+        self.log_damaged = False
         self.output_file = "naver_securities_reports.json"
+        self.output_dir = "reports"  # jsonl/parquet 출력 폴더
+        self.output_formats = tuple(output_formats)
+        unknown = [fmt for fmt in self.output_formats if fmt not in OUTPUT_FORMATS]
+        if unknown:
+            raise ValueError(f"지원하지 않는 저장 형식: {unknown}")
         self.pdf_dir = "pdfs"
+        self.pdf_store = PdfStore(os.path.join(self.pdf_dir, "_store"))
         self.data = self.load_checkpoint()
+        self.seen_keys = self.build_key_index()
+        if self.log_damaged:
+            self.save_checkpoint()  # 잘린 줄 뒤에 이어 쓰지 않도록 바로 압축
         self.max_retries = 3
         self.wait_time = 5  # 대기 시간 증가
         self.max_pages = 2000  # 필요에 따라 조정 가능
+        self.incremental = incremental
+        self.known_run_limit = 10  # 증분 모드에서 연속으로 이 개수만큼 기존 레코드를 만나면 중단
+        self.fetch_mode = fetch_mode
+        self.use_browser = fetch_mode == "browser"
+        self.rate_limiter = RateLimiter(rate=request_rate, host_rates=host_rates)
+        self.throttle = AdaptiveThrottle(self.rate_limiter, min_rate=request_rate / 10, max_rate=request_rate)  # 설정 속도 이하에서만 조절
+        self.session = self.create_session(pool_maxsize=download_workers + 4)  # PDF 다운로드 워커 공용
+        self.category_sessions = {}  # 카테고리별 목록 페이지 세션
+        self.download_pool = PdfDownloadPool(self.download_pdf, num_workers=download_workers)
+        self.browser_lock = threading.Lock()
+        self.sb = None
+        self._sb_context = None
+
+    def create_session(self, pool_maxsize=16):
+        """커넥션을 재사용하는 HTTP 세션을 생성합니다."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Referer": self.base_url,
+        })
+        return session
+
+    def get_category_session(self, category):
+        """카테고리 전용 HTTP 세션을 반환합니다."""
+        if category not in self.category_sessions:
+            self.category_sessions[category] = self.create_session(pool_maxsize=2)
+        return self.category_sessions[category]
+
+    def open_browser(self):
+        """SeleniumBase 브라우저를 (필요할 때만) 실행합니다."""
+        if self.sb is not None:
+            return self.sb
+        self._sb_context = SB(
+            headless=True,
+            undetectable=True,
+            incognito=True
+        )
+        self.sb = self._sb_context.__enter__()
+        # 사용자 에이전트 설정
+        self.sb.driver.execute_cdp_cmd(
+            "Network.setUserAgentOverride",
+            {"userAgent": USER_AGENT}
+        )
+        self.sb.set_window_size(1920, 1080)
+        print("브라우저 설정 완료.")
+        logging.info("브라우저 설정 완료.")
+        return self.sb
+
+    def close_browser(self):
+        """실행 중인 브라우저를 종료합니다."""
+        if self._sb_context is not None:
+            try:
+                self._sb_context.__exit__(None, None, None)
+            except Exception as e:
+                logging.error(f"브라우저 종료 중 에러: {e}")
+            finally:
+                self._sb_context = None
+                self.sb = None
 
     def load_checkpoint(self):
-        """체크포인트 데이터를 로드합니다."""
+        """체크포인트 스냅샷을 로드한 뒤 추가 로그를 재생합니다."""
+        data = {cat: {"data": [], "last_page": 1} for cat in self.categories}
         try:
             if os.path.exists(self.checkpoint_file):
                 with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
                     print("체크포인트 파일에서 데이터 로드 중...")
-                    logging.info("체크포인트 파일에서 데이터 로드 완료.")
-                    return json.load(f)
-            return {cat: {"data": [], "last_page": 1} for cat in self.categories}
+                    data.update(json.load(f))
+            replayed = self.replay_checkpoint_log(data)
+            logging.info(f"체크포인트 파일에서 데이터 로드 완료. (로그 {replayed}건 재생)")
+            return data
         except Exception as e:
             print(f"체크포인트 로드 중 에러: {e}")
             logging.error(f"체크포인트 로드 중 에러: {e}")
             return {cat: {"data": [], "last_page": 1} for cat in self.categories}
 
+    def replay_checkpoint_log(self, data):
+        """
+        체크포인트 로그를 스냅샷 데이터에 반영합니다.
+        압축 도중 중단되어 스냅샷과 로그가 겹쳐도 같은 레코드는 한 번만 반영됩니다.
+
+        Returns: 재생한 로그 줄 수 (int)
+        """
+        if not os.path.exists(self.checkpoint_log):
+            return 0
+
+        keys = {cat: {self.row_key(row_data) for row_data in state["data"]} for cat, state in data.items()}
+        replayed = 0
+        with open(self.checkpoint_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # 기록 도중 중단되어 잘린 줄
+                    logging.warning("체크포인트 로그의 손상된 줄을 건너뜁니다.")
+                    self.log_damaged = True
+                    continue
+                category = entry["category"]
+                state = data.setdefault(category, {"data": [], "last_page": 1})
+                if entry["type"] == "row":
+                    key = self.row_key(entry["data"])
+                    if key not in keys.setdefault(category, set()):
+                        keys[category].add(key)
+                        state["data"].append(entry["data"])
+                elif entry["type"] == "cursor":
+                    state["last_page"] = entry["last_page"]
+                    self.log_pages += 1
+                elif entry["type"] == "high_water":
+                    state["high_water"] = entry["high_water"]
+                replayed += 1
+        return replayed
+
+    def commit_page(self, category, page_data, last_page, high_water=None):
+        """수집한 페이지를 메모리 데이터와 체크포인트 로그(및 JSONL 샤드)에 함께 반영합니다."""
+        with self.checkpoint_lock:
+            state = self.data[category]
+            state["data"].extend(page_data)
+            state["last_page"] = last_page
+            if high_water is not None:
+                state["high_water"] = high_water
+            self.append_checkpoint(category, page_data, last_page, high_water=high_water)
+            # 체크포인트 기록 뒤에 샤드에 추가 (중단 후 재개 시 같은 페이지가 샤드에 두 번 들어가지 않음)
+            if "jsonl" in self.output_formats:
+                self.append_jsonl_shards(category, page_data)
+
+    def append_checkpoint(self, category, rows, last_page, high_water=None):
+        """신규 레코드와 페이지 커서(및 증분 수집 기준점)를 체크포인트 로그에 추가합니다."""
+        with self.checkpoint_lock:
+            self._append_checkpoint(category, rows, last_page, high_water)
+
+    def _append_checkpoint(self, category, rows, last_page, high_water):
+        try:
+            with open(self.checkpoint_log, 'a', encoding='utf-8') as f:
+                for row_data in rows:
+                    f.write(json.dumps({"type": "row", "category": category, "data": row_data}, ensure_ascii=False) + "\n")
+                f.write(json.dumps({"type": "cursor", "category": category, "last_page": last_page}, ensure_ascii=False) + "\n")
+                if high_water is not None:
+                    f.write(json.dumps({"type": "high_water", "category": category, "high_water": high_water}, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.log_pages += 1
+        except Exception as e:
+            print(f"체크포인트 로그 기록 중 에러: {e}")
+            logging.error(f"체크포인트 로그 기록 중 에러: {e}")
+            return
+
+        if self.log_pages >= self.compact_every:
+            self.save_checkpoint()
+
     def save_checkpoint(self):
-        """현재 진행 상황을 체크포인트 파일에 저장합니다."""
+        """현재 진행 상황 전체를 스냅샷으로 저장(압축)하고 체크포인트 로그를 비웁니다."""
+        with self.checkpoint_lock:
+            self._save_checkpoint()
+
+    def _save_checkpoint(self):
         try:
-            with open(self.checkpoint_file, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=4)
+            tmp_path = f"{self.checkpoint_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.checkpoint_file)
+            # 스냅샷 교체 후 로그 비우기 (그 사이 중단되어도 재생 시 중복 반영되지 않음)
+            open(self.checkpoint_log, 'w', encoding='utf-8').close()
+            self.log_pages = 0
             print("체크포인트 저장 완료.")
             logging.info("체크포인트 저장 완료.")
         except Exception as e:
@@ -62,6 +566,15 @@ class NaverPaySecuritiesCrawler:
             logging.error(f"체크포인트 저장 중 에러: {e}")
 
     def save_data(self):
+        """수집된 데이터를 output_formats 형식으로 저장합니다."""
+        if "json" in self.output_formats:
+            self.save_json()
+        if "jsonl" in self.output_formats:
+            self.save_jsonl_shards()
+        if "parquet" in self.output_formats:
+            self.save_parquet()
+
+    def save_json(self):
         """수집된 데이터를 JSON 파일에 저장합니다."""
         try:
             final_data = {cat: self.data[cat]["data"] for cat in self.categories}
@@ -73,8 +586,121 @@ class NaverPaySecuritiesCrawler:
             print(f"데이터 저장 중 에러: {e}")
             logging.error(f"데이터 저장 중 에러: {e}")
 
+    def typed_record(self, row_data):
+        """작성일을 ISO 날짜(YYYY-MM-DD), 조회수를 정수로 변환한 레코드를 반환합니다."""
+        record = dict(row_data)
+        report_date = self.parse_report_date(row_data.get("작성일"))
+        record["작성일"] = report_date.strftime("%Y-%m-%d") if report_date else None
+        views = str(row_data.get("조회수") or "").replace(",", "")
+        record["조회수"] = int(views) if views.isdigit() else None
+        return record
+
+    def append_jsonl_shards(self, category, rows):
+        """
+        수집한 페이지의 레코드를 카테고리/월별 JSONL 샤드 끝에 바로 추가합니다 (중단되어도 수집분이 샤드에 남음).
+        PDF 다운로드는 아직 끝나지 않았을 수 있으므로 PDF_local_path/PDF_sha256은 실행 종료 시 save_jsonl_shards가 채웁니다.
+        """
+        if not rows:
+            return
+        try:
+            category_dir = os.path.join(self.output_dir, category.replace(" ", "_"))
+            os.makedirs(category_dir, exist_ok=True)
+            shards = {}  # 월 -> JSON 줄 목록
+            for row_data in rows:
+                record = self.typed_record(row_data)
+                month = record["작성일"][:7] if record["작성일"] else "unknown"
+                shards.setdefault(month, []).append(json.dumps(record, ensure_ascii=False) + "\n")
+            for month, lines in shards.items():
+                with open(os.path.join(category_dir, f"{month}.jsonl"), 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+        except Exception as e:
+            print(f"JSONL 샤드 추가 중 에러: {e}")
+            logging.error(f"JSONL 샤드 추가 중 에러: {e}")
+
+    def save_jsonl_shards(self):
+        """
+        카테고리/월별 JSONL 샤드(output_dir/카테고리/YYYY-MM.jsonl)를 전체 데이터로 다시 씁니다.
+        수집 중에는 append_jsonl_shards가 페이지 단위로 추가하고, 실행 종료 시 다운로드 결과를 반영해 정리합니다.
+        """
+        try:
+            for category in self.categories:
+                rows = self.data[category]["data"]
+                if not rows:
+                    continue
+                category_dir = os.path.join(self.output_dir, category.replace(" ", "_"))
+                os.makedirs(category_dir, exist_ok=True)
+
+                shards = {}  # 월 -> 임시 파일
+                try:
+                    for row_data in rows:
+                        record = self.typed_record(row_data)
+                        month = record["작성일"][:7] if record["작성일"] else "unknown"
+                        if month not in shards:
+                            shards[month] = open(os.path.join(category_dir, f"{month}.jsonl.tmp"), 'w', encoding='utf-8')
+                        shards[month].write(json.dumps(record, ensure_ascii=False) + "\n")
+                finally:
+                    for f in shards.values():
+                        f.close()
+                for month in shards:
+                    shard_path = os.path.join(category_dir, f"{month}.jsonl")
+                    os.replace(f"{shard_path}.tmp", shard_path)
+            print(f"데이터가 {self.output_dir}에 JSONL 샤드로 저장되었습니다.")
+            logging.info(f"데이터가 {self.output_dir}에 JSONL 샤드로 저장되었습니다.")
+        except Exception as e:
+            print(f"JSONL 샤드 저장 중 에러: {e}")
+            logging.error(f"JSONL 샤드 저장 중 에러: {e}")
+
+    def save_parquet(self):
+        """카테고리별 Parquet 파일(output_dir/카테고리.parquet)에 타입이 지정된 컬럼으로 저장합니다."""
+        try:
+            import pandas as pd  # pyarrow 필요
+        except ImportError:
+            print("Parquet 저장에는 pandas, pyarrow 설치가 필요합니다.")
+            logging.error("Parquet 저장에는 pandas, pyarrow 설치가 필요합니다.")
+            return
+
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            for category in self.categories:
+                rows = self.data[category]["data"]
+                if not rows:
+                    continue
+                df = pd.DataFrame([self.typed_record(row_data) for row_data in rows])
+                df["작성일"] = pd.to_datetime(df["작성일"]).dt.date
+                df["조회수"] = df["조회수"].astype("Int64")
+                df = df.sort_values("작성일", na_position="last")  # 날짜 범위 필터 시 row group 건너뛰기 용이
+                parquet_path = os.path.join(self.output_dir, f"{category.replace(' ', '_')}.parquet")
+                df.to_parquet(f"{parquet_path}.tmp", index=False, engine="pyarrow")
+                os.replace(f"{parquet_path}.tmp", parquet_path)
+            print(f"데이터가 {self.output_dir}에 Parquet으로 저장되었습니다.")
+            logging.info(f"데이터가 {self.output_dir}에 Parquet으로 저장되었습니다.")
+        except Exception as e:
+            print(f"Parquet 저장 중 에러: {e}")
+            logging.error(f"Parquet 저장 중 에러: {e}")
+
+    def is_complete_pdf(self, pdf_path):
+        """저장된 파일이 온전한 PDF인지 (시작 매직, 끝 %%EOF) 확인합니다."""
+        try:
+            size = os.path.getsize(pdf_path)
+            if size < len(PDF_MAGIC):
+                return False
+            with open(pdf_path, 'rb') as f:
+                if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                    return False
+                f.seek(max(size - 1024, 0))
+                return b"%%EOF" in f.read()
+        except OSError:
+            return False
+
     def download_pdf(self, pdf_url, category, title, date):
-        """PDF 파일을 다운로드하여 저장합니다."""
+        """
+        PDF를 콘텐츠 주소 저장소에 스트리밍 다운로드하고 카테고리 폴더에 연결합니다.
+        이미 받은 URL은 조건부 요청(ETag/Last-Modified)으로 변경 여부만 확인합니다.
+        429/5xx/연결 오류는 throttle 백오프 후 max_retries까지 재시도합니다.
+
+        Returns: {"PDF_local_path": 경로, "PDF_sha256": 해시} / 실패 시 None
+        """
+        pdf_filename = pdf_url
         try:
             # 카테고리별 폴더 생성
             category_dir = os.path.join(self.pdf_dir, category.replace(" ", "_"))
@@ -83,153 +709,392 @@ class NaverPaySecuritiesCrawler:
             # 파일명 생성 (특수문자 제거)
             safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '_')).replace(" ", "_")
             safe_date = date.replace(".", "")
-            pdf_filename = f"{safe_date}_{safe_title}.pdf"  # 수정: 날짜_제목 형식으로 변경
-            pdf_path = os.path.join(category_dir, pdf_filename)
-            
-            # 이미 파일이 존재하면 스킵
-            if os.path.exists(pdf_path):
-                print(f"{pdf_filename} 이미 존재. 다운로드 스킵.")
-                logging.info(f"{pdf_filename} 이미 존재. 다운로드 스킵.")
-                return pdf_path
-            
-            # PDF 다운로드
-            headers = {
-                "User-Agent": (
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/138.0.7204.97 Safari/537.36"
-                )
-            }
-            response = requests.get(pdf_url, headers=headers, stream=True)
-            if response.status_code == 200:
-                with open(pdf_path, 'wb') as f:
-                    f.write(response.content)
-                #print(f"{pdf_filename} 다운로드 완료.")
-                logging.info(f"{pdf_filename} 다운로드 완료.")
-                return pdf_path
+            pdf_filename = f"{safe_date}_{safe_title}.pdf"
+
+            known = self.pdf_store.lookup_url(pdf_url)
+            if known and not self.is_complete_pdf(self.pdf_store.object_path(known["sha256"])):
+                known = None  # 저장소 객체가 없거나 손상됨
+
+            headers = {}
+            if known and known.get("etag"):
+                headers["If-None-Match"] = known["etag"]
+            if known and known.get("last_modified"):
+                headers["If-Modified-Since"] = known["last_modified"]
+
+            if known and not headers:
+                # 검증 헤더를 주지 않는 서버: 리포트 PDF URL은 내용이 바뀌지 않으므로 재사용
+                fetched = (known["sha256"], None, None)
             else:
-                print(f"{pdf_filename} 다운로드 실패: HTTP {response.status_code}")
-                logging.error(f"{pdf_filename} 다운로드 실패: HTTP {response.status_code}")
-                return None
+                fetched = None
+                for attempt in range(self.max_retries):
+                    try:
+                        fetched = self.fetch_pdf_object(pdf_url, pdf_filename, known, headers)
+                        break
+                    except (RetryableHTTPError, requests.ConnectionError, requests.Timeout) as e:
+                        logging.warning(f"{pdf_filename} 다운로드 재시도 ({attempt + 1}/{self.max_retries}): {e}")
+                if fetched is None:
+                    return None
+
+            sha256, etag, last_modified = fetched
+            self.pdf_store.record(category, title, date, pdf_url, sha256, etag, last_modified)
+            # 같은 제목의 다른 리포트와 겹치지 않도록 해시 앞부분을 파일명에 포함
+            pdf_path = self.pdf_store.link(sha256, os.path.join(category_dir, f"{safe_date}_{safe_title}_{sha256[:8]}.pdf"))
+            return {"PDF_local_path": pdf_path, "PDF_sha256": sha256}
         except Exception as e:
             print(f"{pdf_filename} 다운로드 중 에러: {e}")
             logging.error(f"{pdf_filename} 다운로드 중 에러: {e}")
             return None
-        
+
+    def fetch_pdf_object(self, pdf_url, pdf_filename, known, headers):
+        """
+        PDF를 한 번 요청하여 (청크 단위로 임시 파일에 기록하며 해시 계산) 저장소에 넣습니다.
+
+        Returns: (sha256, etag, last_modified) / 재시도 불필요한 실패 시 None
+        Raises: RetryableHTTPError, requests.ConnectionError, requests.Timeout
+        """
+        tmp_path = None
+        self.throttle.acquire(pdf_url)
+        started = time.monotonic()
+        try:
+            with self.session.get(pdf_url, stream=True, timeout=self.wait_time * 6, headers=headers) as response:
+                if response.status_code == 304:
+                    self.throttle.record(pdf_url, 304, time.monotonic() - started)
+                    logging.info(f"{pdf_filename} 변경 없음. 다운로드 스킵.")
+                    return (known["sha256"],
+                            response.headers.get("ETag", known.get("etag")),
+                            response.headers.get("Last-Modified", known.get("last_modified")))
+                if response.status_code != 200:
+                    self.throttle.record(pdf_url, response.status_code, time.monotonic() - started,
+                                         retry_after=response.headers.get("Retry-After"))
+                    if response.status_code in RETRY_STATUS_CODES:
+                        raise RetryableHTTPError(response.status_code, response.headers.get("Retry-After"))
+                    print(f"{pdf_filename} 다운로드 실패: HTTP {response.status_code}")
+                    logging.error(f"{pdf_filename} 다운로드 실패: HTTP {response.status_code}")
+                    return None
+
+                expected_size = response.headers.get("Content-Length")
+                if response.headers.get("Content-Encoding"):
+                    expected_size = None  # 압축 전송 시 길이 비교 불가
+                fd, tmp_path = self.pdf_store.new_temp_file()
+                hasher = hashlib.sha256()
+                written = 0
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=PDF_CHUNK_SIZE):
+                        if not chunk:
+                            continue
+                        if written == 0 and not chunk.startswith(PDF_MAGIC):
+                            raise ValueError("PDF 형식이 아닌 응답")
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        written += len(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.throttle.record(pdf_url, 200, time.monotonic() - started)
+
+                if written == 0:
+                    raise ValueError("빈 응답")
+                if expected_size is not None and written != int(expected_size):
+                    # 전송 도중 끊긴 경우이므로 재시도
+                    raise requests.ConnectionError(f"크기 불일치 ({written}/{expected_size} bytes)")
+
+                sha256 = hasher.hexdigest()
+                self.pdf_store.put(tmp_path, sha256)
+                tmp_path = None
+                logging.info(f"{pdf_filename} 다운로드 완료.")
+                return sha256, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except (requests.ConnectionError, requests.Timeout):
+            self.throttle.record(pdf_url, None, time.monotonic() - started)
+            raise
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def fetch_page_html(self, session, url, page_num):
+        """
+        브라우저 없이 목록 페이지 HTML을 가져옵니다.
+
+        Returns:
+            - HTML (bytes): 성공
+            - "blocked": 봇 탐지로 차단된 경우
+            - None: 재시도 후에도 실패한 경우
+        """
+        full_url = f"{self.base_url}{url}?page={page_num}"
+        for attempt in range(self.max_retries):
+            started = time.monotonic()
+            try:
+                print(f"{full_url} 요청 중 (시도 {attempt + 1}/{self.max_retries})")
+                logging.info(f"{full_url} 요청 중")
+                self.throttle.acquire(full_url)  # 이전 실패에 따른 백오프 대기 포함
+                started = time.monotonic()
+                response = session.get(full_url, timeout=self.wait_time)
+                self.throttle.record(full_url, response.status_code, time.monotonic() - started,
+                                     retry_after=response.headers.get("Retry-After"))
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries - 1:
+                    logging.warning(f"페이지 {page_num} 요청 지연 응답: HTTP {response.status_code}. 재시도합니다.")
+                    continue
+                if response.status_code in BLOCKED_STATUS_CODES:
+                    logging.warning(f"페이지 {page_num} 요청 차단: HTTP {response.status_code}")
+                    return "blocked"
+                response.raise_for_status()
+                return response.content
+            except Exception as e:
+                if not isinstance(e, requests.HTTPError):
+                    self.throttle.record(full_url, None, time.monotonic() - started)
+                print(f"페이지 {page_num} 요청 중 에러: {e}")
+                logging.error(f"페이지 {page_num} 요청 중 에러: {e}")
+                if attempt == self.max_retries - 1:
+                    return None
+        return None
+
+    def parse_table_html(self, html, category):
+        """
+        목록 페이지 HTML에서 테이블 행을 파싱합니다.
+
+        Returns: 행 데이터 (list) / 테이블이 없으면 None (봇 탐지 페이지 등)
+        """
+        soup = BeautifulSoup(html, "lxml")
+        table = soup.select_one(TABLE_SELECTOR)
+        if table is None:
+            return None
+
+        rows = []
+        for row in table.find_all("tr")[1:]:  # 헤더 행 제외
+            cols = row.find_all("td")
+            if len(cols) < 4:  # 열 개수 확인
+                continue
+            texts = [col.get_text(" ", strip=True) for col in cols]
+
+            pdf_col_index = 3 if category in ["종목분석 리포트", "산업분석 리포트"] else 2
+            pdf_anchor = cols[pdf_col_index].find("a")
+            pdf_href = pdf_anchor.get("href") if pdf_anchor is not None else None
+            rows.append(self.build_row_data(category, texts, pdf_href))
+        return rows
+
+    def fetch_page_rows(self, category, url, page_num):
+        """
+        목록 페이지의 행 데이터를 가져옵니다.
+        HTTP 모드에서 봇 탐지 시 브라우저 모드로 전환합니다.
+
+        Returns: 행 데이터 (list) / 페이지 이동 실패 시 None
+        """
+        if not self.use_browser:
+            html = self.fetch_page_html(self.get_category_session(category), url, page_num)
+            if html is None:
+                return None
+            rows = self.parse_table_html(html, category) if html != "blocked" else None
+            if rows is not None:
+                return rows
+
+            print(f"페이지 {page_num} 봇 탐지 의심. 브라우저 모드로 전환합니다.")
+            logging.warning(f"페이지 {page_num} 봇 탐지 의심. 브라우저 모드로 전환")
+            self.use_browser = True
+
+        # 브라우저는 하나를 카테고리 스레드들이 번갈아 사용
+        with self.browser_lock:
+            sb = self.open_browser()
+            if not self.navigate_to_page(sb, url, page_num):
+                return None
+            # 셀마다 WebDriver를 호출하지 않도록 페이지 소스를 한 번에 파싱
+            return self.parse_table_html(sb.get_page_source(), category) or []
+
     def navigate_to_page(self, sb, url, page_num):
         """특정 페이지로 이동합니다."""
+        full_url = f"{self.base_url}{url}?page={page_num}"
         for attempt in range(self.max_retries):
+            started = time.monotonic()
             try:
-                full_url = f"{self.base_url}{url}?page={page_num}"
                 print(f"{full_url}로 이동 중 (시도 {attempt + 1}/{self.max_retries})")
                 logging.info(f"{full_url}로 이동 중")
+                self.throttle.acquire(full_url)  # 이전 실패에 따른 백오프 대기 포함
+                started = time.monotonic()
                 sb.open(full_url)
                 WebDriverWait(sb.driver, self.wait_time).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#contentarea_left > div.box_type_m > table.type_1"))
+                    EC.presence_of_element_located((By.CSS_SELECTOR, TABLE_SELECTOR))
                 )
-                # 랜덤 스크롤로 봇 탐지 회피
+                self.throttle.record(full_url, 200, time.monotonic() - started)
+                # 스크롤로 봇 탐지 회피
                 sb.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(random.uniform(0.5, 2))
                 print(f"페이지 {page_num}로 이동 성공")
                 return True
             except Exception as e:
+                self.throttle.record(full_url, None, time.monotonic() - started)
                 print(f"페이지 {page_num} 이동 중 에러: {e}")
                 logging.error(f"페이지 {page_num} 이동 중 에러: {e}")
                 if attempt == self.max_retries - 1:
                     return False
-                time.sleep(random.uniform(1, 3))
         return False
 
-    def extract_table_data(self, sb, category):
-        """현재 페이지에서 테이블 데이터를 추출합니다."""
+    def build_row_data(self, category, texts, pdf_href):
+        """셀 텍스트와 PDF 링크로 카테고리별 행 데이터를 구성합니다."""
+        pdf_link = None
+        if pdf_href and pdf_href.endswith(".pdf"):
+            pdf_link = urljoin(self.base_url, pdf_href)
+
+        if category == "종목분석 리포트":
+            return {
+                "종목명": texts[0],
+                "제목": texts[1],
+                "증권사": texts[2],
+                "PDF": pdf_link,
+                "작성일": texts[4] if len(texts) > 4 else "",
+                "조회수": texts[5] if len(texts) > 5 else ""
+            }
+        elif category == "산업분석 리포트":
+            return {
+                "분류": texts[0],
+                "제목": texts[1],
+                "증권사": texts[2],
+                "PDF": pdf_link,
+                "작성일": texts[4] if len(texts) > 4 else "",
+                "조회수": texts[5] if len(texts) > 5 else ""
+            }
+        else:
+            return {
+                "제목": texts[0],
+                "증권사": texts[1],
+                "PDF": pdf_link,
+                "작성일": texts[3] if len(texts) > 3 else "",
+                "조회수": texts[4] if len(texts) > 4 else ""
+            }
+
+    def row_key(self, row_data):
+        """레코드 식별 키: PDF URL, 없으면 (제목, 증권사, 작성일)"""
+        if row_data.get("PDF"):
+            return row_data["PDF"]
+        return (row_data.get("제목"), row_data.get("증권사"), row_data.get("작성일"))
+
+    def build_key_index(self):
+        """체크포인트 데이터로 카테고리별 레코드 키 인덱스를 구성합니다."""
+        return {
+            cat: {self.row_key(row_data) for row_data in self.data.get(cat, {}).get("data", [])}
+            for cat in self.categories
+        }
+
+    def is_new_row(self, category, row_data):
+        """이미 수집된 레코드인지 키 인덱스로 확인합니다."""
+        return self.row_key(row_data) not in self.seen_keys[category]
+
+    def extract_table_data(self, category, rows):
+        """페이지에서 읽은 행 데이터 중 신규 레코드만 반환하고 PDF 다운로드를 등록합니다."""
         try:
             print(f"{category} 카테고리 데이터 추출 중")
             logging.info(f"{category} 카테고리 데이터 추출 중")
-            table = sb.find_element(By.CSS_SELECTOR, "#contentarea_left > div.box_type_m > table.type_1")
-            rows = table.find_elements(By.TAG_NAME, "tr")[1:]  # 헤더 행 제외
             data_list = []
 
-            for row in rows:
-                cols = row.find_elements(By.TAG_NAME, "td")
-                if len(cols) < 4:  # 열 개수 확인
+            for row_data in rows:
+                if not self.is_new_row(category, row_data):
                     continue
-
-                # PDF 링크 추출
-                pdf_link = None
-                pdf_col_index = 3 if category in ["종목분석 리포트", "산업분석 리포트"] else 2
-                try:
-                    pdf_anchor = cols[pdf_col_index].find_element(By.TAG_NAME, "a")
-                    pdf_href = pdf_anchor.get_attribute("href")
-                    if pdf_href and pdf_href.endswith(".pdf"):
-                        pdf_link = urljoin(self.base_url, pdf_href)
-                except:
-                    pdf_link = None
-                
-                # 데이터 구성
-                if category == "종목분석 리포트":
-                    row_data = {
-                        "종목명": cols[0].text.strip(),
-                        "제목": cols[1].text.strip(),
-                        "증권사": cols[2].text.strip(),
-                        "PDF": pdf_link,
-                        "작성일": cols[4].text.strip() if len(cols) > 4 else "",
-                        "조회수": cols[5].text.strip() if len(cols) > 5 else ""
-                    }
-                elif category == "산업분석 리포트":
-                    row_data = {
-                        "분류": cols[0].text.strip(),
-                        "제목": cols[1].text.strip(),
-                        "증권사": cols[2].text.strip(),
-                        "PDF": pdf_link,
-                        "작성일": cols[4].text.strip() if len(cols) > 4 else "",
-                        "조회수": cols[5].text.strip() if len(cols) > 5 else ""
-                    }
-                else:
-                    row_data = {
-                        "제목": cols[0].text.strip(),
-                        "증권사": cols[1].text.strip(),
-                        "PDF": pdf_link,
-                        "작성일": cols[3].text.strip() if len(cols) > 3 else "",
-                        "조회수": cols[4].text.strip() if len(cols) > 4 else ""
-                    }
-
-                # PDF 다운로드
-                if pdf_link:
-                    pdf_path = self.download_pdf(pdf_link, category, row_data["제목"], row_data["작성일"])
-                    row_data["PDF_local_path"] = pdf_path if pdf_path else None
-                
-                if row_data not in self.data[category]["data"]:
-                    data_list.append(row_data)
+                self.seen_keys[category].add(self.row_key(row_data))
+                # PDF 다운로드 (워커 풀에서 비동기 처리)
+                if row_data["PDF"]:
+                    self.download_pool.submit(row_data, category)
+                data_list.append(row_data)
             return data_list
         except Exception as e:
             print(f"{category} 테이블 데이터 추출 중 에러: {e}")
             logging.error(f"{category} 테이블 데이터 추출 중 에러: {e}")
             return []
 
-    def crawl_category(self, sb, category, url):
+    def parse_report_date(self, date):
+        """목록의 작성일(yy.mm.dd)을 datetime으로 변환합니다. 실패 시 None"""
+        try:
+            return datetime.strptime(date, "%y.%m.%d")
+        except (TypeError, ValueError):
+            return None
+
+    def compute_high_water(self, rows, high_water=None):
+        """레코드 중 가장 최신 작성일과 그 PDF URL로 증분 수집 기준점을 계산합니다."""
+        best = high_water
+        best_date = self.parse_report_date(high_water["date"]) if high_water else None
+        for row_data in rows:
+            row_date = self.parse_report_date(row_data.get("작성일"))
+            if row_date is not None and (best_date is None or row_date > best_date):
+                best = {"date": row_data["작성일"], "pdf": row_data.get("PDF")}
+                best_date = row_date
+        return best
+
+    def is_behind_high_water(self, row_data, high_water):
+        """기준점의 PDF이거나 기준점보다 오래된 레코드인지 확인합니다."""
+        if not high_water:
+            return False
+        if row_data.get("PDF") and row_data["PDF"] == high_water.get("pdf"):
+            return True
+        row_date = self.parse_report_date(row_data.get("작성일"))
+        hw_date = self.parse_report_date(high_water.get("date"))
+        return row_date is not None and hw_date is not None and row_date < hw_date
+
+    def crawl_category_incremental(self, category, url):
+        """
+        1페이지(최신)부터 신규 리포트만 수집합니다.
+        기존 레코드 또는 기준점 이전 레코드가 연속 known_run_limit개 나오면 중단합니다.
+        """
+        state = self.data[category]
+        high_water = state.get("high_water") or self.compute_high_water(state["data"])
+        print(f"{category} 증분 크롤링 시작 (기준점 {high_water})")
+        logging.info(f"{category} 증분 크롤링 시작 (기준점 {high_water})")
+
+        page_num = 1
+        known_run = 0
+        collected = []
+        caught_up = False
+        while page_num <= self.max_pages and not caught_up:
+            rows = self.fetch_page_rows(category, url, page_num)
+            if not rows:
+                print(f"{category}의 페이지 {page_num} 이동 실패 또는 데이터 없음. 중단합니다.")
+                logging.warning(f"{category}의 페이지 {page_num} 이동 실패 또는 데이터 없음")
+                break
+
+            fresh_rows = []
+            for row_data in rows:
+                if self.is_new_row(category, row_data) and not self.is_behind_high_water(row_data, high_water):
+                    known_run = 0
+                    fresh_rows.append(row_data)
+                    continue
+                known_run += 1
+                if known_run >= self.known_run_limit:
+                    caught_up = True
+                    break
+
+            page_data = self.extract_table_data(category, fresh_rows)
+            collected.extend(page_data)
+            # 기준점은 기존 구간까지 빈틈없이 따라잡았을 때만 갱신
+            new_high_water = self.compute_high_water(collected, high_water) if caught_up else None
+            self.commit_page(category, page_data, state["last_page"], high_water=new_high_water)
+            print(f"{category}의 페이지 {page_num}에서 신규 {len(page_data)}개 레코드 수집")
+            logging.info(f"{category}의 페이지 {page_num}에서 신규 {len(page_data)}개 레코드 수집")
+
+            page_num += 1
+
+        print(f"{category} 증분 크롤링 완료: 신규 {len(collected)}개")
+        logging.info(f"{category} 증분 크롤링 완료: 신규 {len(collected)}개")
+
+    def crawl_category(self, category, url):
         """주어진 카테고리의 모든 페이지를 크롤링합니다."""
         try:
+            if self.incremental:
+                return self.crawl_category_incremental(category, url)
+
             last_page = self.data[category]["last_page"]
             print(f"{category} 크롤링 시작 (페이지 {last_page}부터)")
             logging.info(f"{category} 크롤링 시작 (페이지 {last_page}부터)")
 
             while last_page <= self.max_pages:
-                if not self.navigate_to_page(sb, url, last_page):
+                rows = self.fetch_page_rows(category, url, last_page)
+                if rows is None:
                     print(f"{category}의 페이지 {last_page} 이동 실패. 중단합니다.")
                     logging.warning(f"{category}의 페이지 {last_page} 이동 실패")
                     break
 
-                page_data = self.extract_table_data(sb, category)
-                if not page_data:
+                if not rows:
                     print(f"{category}의 페이지 {last_page}에서 데이터 없음. 중단합니다.")
                     logging.info(f"{category}의 페이지 {last_page}에서 데이터 없음")
                     break
 
-                self.data[category]["data"].extend(page_data)
-                self.data[category]["last_page"] = last_page + 1
-                self.save_checkpoint()
+                # 신규 레코드가 없는 페이지도 계속 진행 (새 리포트로 밀려 내려온 기존 행일 수 있음)
+                page_data = self.extract_table_data(category, rows)
+                self.commit_page(category, page_data, last_page + 1)
                 print(f"{category}의 페이지 {last_page}에서 {len(page_data)}개 레코드 수집")
                 logging.info(f"{category}의 페이지 {last_page}에서 {len(page_data)}개 레코드 수집")
-                time.sleep(random.uniform(1, 3))
 
                 # # 동적 페이지네이션 확인
                 # next_button = sb.find_elements("a.next")
@@ -250,42 +1115,72 @@ class NaverPaySecuritiesCrawler:
             logging.error(f"{category} 크롤링 중 에러: {e}")
             self.save_checkpoint()
 
+    def requeue_pending_downloads(self):
+        """체크포인트에서 다운로드가 끝나지 않은 레코드를 다시 등록합니다."""
+        pending = 0
+        for category in self.categories:
+            for row_data in self.data[category]["data"]:
+                if row_data.get("PDF") and not row_data.get("PDF_local_path"):
+                    self.download_pool.submit(row_data, category)
+                    pending += 1
+        if pending:
+            print(f"미완료 PDF {pending}개 다운로드 재등록")
+            logging.info(f"미완료 PDF {pending}개 다운로드 재등록")
+
+    def report_throttle(self):
+        """호스트별 현재 요청 속도와 오류 카운터를 출력합니다."""
+        for host, st in self.throttle.snapshot().items():
+            print(f"[{host}] 속도 {st['rate']}/s, 요청 {st['requests']}회, 오류 {st['errors']}회 "
+                  f"(차단 {st['throttled']}회, 오류율 {st['error_rate']}), 평균 응답 {st['avg_latency']:.2f}초")
+            logging.info(f"요청 상태 {host}: {st}")
+
     def run(self):
         """크롤러를 실행하는 메인 메서드입니다."""
-        with SB(
-            headless=True,
-            undetectable=True,
-            incognito=True
-        ) as sb:
-            try:
-                # 사용자 에이전트 설정
-                sb.driver.execute_cdp_cmd(
-                    "Network.setUserAgentOverride",
-                    {
-                        "userAgent": (
-                            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                            "(KHTML, like Gecko) Chrome/138.0.7204.97 Safari/537.36"
-                        )
-                    }
-                )
-                sb.set_window_size(1920, 1080)
-                print("브라우저 설정 완료.")
-                logging.info("브라우저 설정 완료.")
-                # 크롤링 메인 작업
-                for category, url in self.categories.items():
-                    if category == '경제분석 리포트' or category == '채권분석 리포트':
-                        continue
+        self.download_pool.start()
+        try:
+            if self.use_browser:
+                self.open_browser()
+            self.requeue_pending_downloads()
+            # 크롤링 메인 작업 (카테고리별 동시 수집, 요청 속도는 rate_limiter가 호스트 단위로 제한)
+            with ThreadPoolExecutor(max_workers=len(self.target_categories)) as executor:
+                futures = {}
+                for category in self.target_categories:
                     print(f"{category} 처리 중")
                     logging.info(f"{category} 처리 중")
-                    self.crawl_category(sb, category, url)
-                self.save_data()
-                print("크롤링 성공적으로 완료.")
-                logging.info("크롤링 성공적으로 완료.")
-            except Exception as e:
-                print(f"메인 실행 중 에러: {e}")
-                logging.error(f"메인 실행 중 에러: {e}")
-                self.save_checkpoint()
+                    futures[executor.submit(self.crawl_category, category, self.categories[category])] = category
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"{futures[future]} 처리 중 에러: {e}")
+                        logging.error(f"{futures[future]} 처리 중 에러: {e}")
+            self.download_pool.join()
+            self.report_throttle()
+            self.save_checkpoint()
+            self.save_data()
+            print("크롤링 성공적으로 완료.")
+            logging.info("크롤링 성공적으로 완료.")
+        except Exception as e:
+            print(f"메인 실행 중 에러: {e}")
+            logging.error(f"메인 실행 중 에러: {e}")
+            self.save_checkpoint()
+        finally:
+            self.download_pool.shutdown()
+            self.close_browser()
+            self.session.close()
+            for session in self.category_sessions.values():
+                session.close()
 
 if __name__ == "__main__":
-    crawler = NaverPaySecuritiesCrawler()
+    parser = argparse.ArgumentParser(description="네이버페이 증권 리포트 크롤러")
+    parser.add_argument("--incremental", action="store_true", help="최신 페이지부터 신규 리포트만 수집")
+    parser.add_argument("--fetch-mode", choices=["http", "browser"], default="http", help="목록 페이지 요청 방식")
+    parser.add_argument("--categories", nargs="+", default=list(DEFAULT_CATEGORIES), help="수집할 카테고리명 (예: \"종목분석 리포트\")")
+    parser.add_argument("--rate", type=float, default=2.0, help="호스트별 초당 요청 수")
+    parser.add_argument("--output-format", nargs="+", choices=OUTPUT_FORMATS, default=["json"], help="결과 저장 형식 (jsonl/parquet는 추가 지정 시 생성)")
+    args = parser.parse_args()
+
+    crawler = NaverPaySecuritiesCrawler(fetch_mode=args.fetch_mode, incremental=args.incremental,
+                                        categories=args.categories, request_rate=args.rate,
+                                        output_formats=args.output_format)
     crawler.run()
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""
+PdfTextExtractor 프로세스 풀 작업 함수.
+spawn 방식(Windows 기본)의 작업 프로세스는 작업 함수가 정의된 모듈을 다시 import하므로,
+환경 변수 로드/클라이언트 생성/KRX 로그인 등 부작용이 있는 stock_report_insight_modules와 분리해 pdfplumber만 사용.
+"""
+import pdfplumber
+
+
+def extract_pdf_pages(file_path:str, max_pages:int=None) -> tuple[list[str], bool]:
+    """프로세스 풀 작업용 - (페이지 텍스트 목록, 전체 페이지 추출 여부)"""
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        num_pages = len(pdf.pages)
+        for page in pdf.pages[:max_pages]:
+            pages.append(page.extract_text() or "")
+            page.close()
+    return pages, len(pages) == num_pages
@@ -15,6 +15,8 @@ from concurrent.futures import ThreadPoolExecutor, as_completed#, ProcessPoolExe
 from pykrx import stock
 import psycopg2
 
+from stock_report_insight_modules import ExtractionCache, file_sha256, gemini_client_pool, gemini_file_cache
+
 IS_COLAB_ENV = False# is_colab()
 
 pdf_path = 'D:/jjjys/pdfs'
@@ -68,21 +70,28 @@ Example JSON format:
 """
 
 
-def ask_gemini(directory_path:str, file_name:str, prompt:str=system_prompt, api_key:str=None, return_dict:bool=True, sleep:int=0) -> str:
+def ask_gemini(directory_path:str, file_name:str, prompt:str=system_prompt, api_key:str=None, return_dict:bool=True, sleep:int=0,
+               cache:ExtractionCache=None, llm_version:str="2.5-flash") -> str:
     if api_key is None:
         api_key = os.getenv('GOOGLE_API_KEY')
 
-    client = genai.Client(api_key=api_key)
-
     if file_name is not None:
         file_path = os.path.join(directory_path, file_name)
 
+        # 같은 PDF/프롬프트/모델로 이미 추출한 결과는 재사용
+        pdf_hash = file_sha256(file_path)
+        cached = cache.get(pdf_hash, prompt, "gemini", llm_version) if cache is not None else None
+        if cached is not None:
+            return cached if return_dict else json.dumps(cached, ensure_ascii=False)
+
+        client = gemini_client_pool.get(api_key)
+
         try:
-            # Upload the file using the genai client
-            sample_file = client.files.upload(file=file_path)
+            # 작은 PDF는 inline, 큰 PDF는 업로드 핸들 재사용
+            sample_file = gemini_file_cache.get_part(client, api_key, file_path, pdf_hash)
 
             # Generate content using the uploaded file and the prompt
-            response = client.models.generate_content(model="gemini-2.5-flash",
+            response = client.models.generate_content(model=f"gemini-{llm_version}",
                                                       contents=[sample_file, prompt])
 
             result = response.text.replace("```json", "").replace("```", "")
@@ -90,6 +99,11 @@ def ask_gemini(directory_path:str, file_name:str, prompt:str=system_prompt, api_
             if sleep > 0:
                 time.sleep(sleep)
 
+            if cache is not None:
+                parsed = json.loads(result)
+                if is_validate_report_data(parsed):  # 필수 데이터가 있는 결과만 캐시
+                    cache.put(pdf_hash, prompt, "gemini", llm_version, parsed)
+
             if return_dict:
                 return json.loads(result)
             else:
@@ -339,6 +353,9 @@ if __name__=="__main__":
         conn.commit()
         print("REPORT_HIT 테이블이 성공적으로 생성되었습니다.\n")
 
+        # 중단 후 재실행 시 이미 추출한 PDF는 Gemini 호출 없이 캐시 결과 사용
+        extraction_cache = ExtractionCache()
+
         # Assuming pdf_path, get_report_pdf_files, process_single_pdf, ask_gemini are defined in previous cells
         # You might need to ensure these are defined or modify this part if they are not
         try:
@@ -347,6 +364,7 @@ if __name__=="__main__":
                                                                                     process_single_pdf,
                                                                                     ask_gemini,
                                                                                     find_target_hit_date,
+                                                                                    feat_extractor_kwargs={"cache": extraction_cache},
                                                                                     #   num_workers=1,
                                                                                     conn=conn, cursor=cursor)
         except NameError as e:
@@ -7,16 +7,27 @@ import yaml
 
 # 모델
 from google import genai
+from google.genai import types, errors
+import ollama
+
+# PDF
+import pdfplumber
+from pypdf import PdfReader, PdfWriter
 
 import numpy as np
 import pandas as pd
 
-from datetime import datetime, timedelta
-import os, subprocess, time, json, shutil
+from datetime import datetime, timedelta, timezone
+import os, subprocess, time, json, shutil, re
+import hashlib, sqlite3, threading, tempfile
+import asyncio
+from collections import deque
 import warnings
 
 # 병렬처리
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import multiprocessing
+from pdf_text_worker import extract_pdf_pages  # 작업 프로세스가 이 모듈(부작용 있음)을 다시 import하지 않도록 분리
 
 import traceback
 import psycopg2
@@ -24,7 +35,8 @@ from pykrx import stock
 
 # DB 스키마
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, create_model
 from multipledispatch import dispatch
 
 load_dotenv()
@@ -75,6 +87,46 @@ Example JSON format:
 """
 
 
+class ReportFields(BaseModel):
+    """system_prompt 추출 항목과 같은 응답 스키마 (Gemini response_schema용)"""
+    stock: str = Field(description="종목명, Stock Name")
+    ticker: str = Field(description="종목코드/티커, Stock Code/Ticker")
+    published_date: str = Field(description="리포트 작성일, Date of Report (YYYY-MM-DD)")
+    current_price: int = Field(description="현재 주가, Current Stock Price - only numeric, positive integer value")
+    target_price: int = Field(description="목표 주가, Target Stock Price - only numeric, positive integer value")
+    investment_opinion: Literal["Buy", "Hold", "Sell", "N/A"] = Field(description="투자 의견 - only in Buy, Hold or Sell")
+    author: str = Field(description="작성 애널리스트, Author Analyst")
+    firm: str = Field(description="소속 증권사, Affiliated Securities Firm")
+
+
+reask_prompt = """
+Some fields could not be read in the previous extraction of this securities report PDF file.
+Extract only the following details and return them in JSON format:
+
+{fields}
+
+If a piece of information is not found, use 'N/A' for string values and 0 for numeric values.
+Return only the JSON object. Do not include any other text.
+"""
+
+# 로컬 모델(Ollama) RAG - 항목별 관련 청크 검색용 질문
+ollama_prompts = {"종목명": "본 보고서가 취급하는 종목명이 무엇인가요?",
+                  "종목코드": "본 보고서가 취급하는 기업의 티커(ticker)가 무엇인가요?",
+                  "작성일": "본 보고서가 발행된 일시를 yyyy-mm-dd 형태로 답하세요.",
+                  "현재 주가": "본 보고서에 발표된 현재 주가를 답하세요. (KRW)",
+                  "목표 주가": "본 보고서에 발표된 목표 주가를 답하세요. (KRW)",
+                  "투자 의견": "본 보고서에 발표된 투자 의견을 답하세요. (Buy, Hold, Sell)",
+                  "작성 애널리스트": "본 보고서에 발표된 작성 애널리스트는 누구인가요?",
+                  "소속 증권사": "본 보고서에 발표된 소속 증권사의 기업명은 무엇인가요?"}
+
+packed_prompt_suffix = """
+This request contains {num_docs} separate securities report PDF files. Each file is preceded by its document id.
+Apply the instructions above to each file independently and return a JSON array with exactly one object per file.
+Each object must include a "doc_id" field with the document id of the file it was extracted from.
+Return only the JSON array. Do not include any other text.
+"""
+
+
 # ------------------------------
 # 공통 베이스 클래스 정의
 # ------------------------------
@@ -287,6 +339,1229 @@ class DBNode(Node):
                 return self.cursor.fetchall()
             
 
+# ------------------------------
+# LLM 호출 계측 (지연 시간, 토큰, 비용)
+# ------------------------------
+# 모델 버전별 100만 토큰당 가격 (USD, 입력/출력 - 출력에는 thinking 토큰 포함)
+LLM_PRICES = {
+    "2.5-pro": (1.25, 10.00),
+    "2.5-flash": (0.30, 2.50),
+    "2.5-flash-lite": (0.10, 0.40),
+    "2.0-flash": (0.10, 0.40),
+}
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120)  # 초
+TOKEN_BUCKETS = (1000, 2000, 5000, 10000, 20000, 50000, 100000)
+
+
+class Histogram:
+    """고정 구간 히스토그램 (구간별 관측 개수)"""
+    def __init__(self, buckets:tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막은 상한 초과
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value:int|float):
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q:float) -> float|None:
+        """q 분위수가 속한 구간 상한 (상한 초과 구간은 inf)"""
+        if self.count == 0:
+            return None
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {"count": self.count, "mean": self.total / self.count if self.count else None,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "buckets": dict(zip(labels, self.counts))}
+
+
+class LLMCallRecord:
+    """LLM 호출 1회의 계측값. with 블록 종료 시 LLMTelemetry에 기록 (예외 발생 시 실패로 기록)"""
+    def __init__(self, telemetry, llm_type:str, llm_version:str, doc:str, stage:str):
+        self.telemetry = telemetry
+        self.values = {"llm_type": llm_type, "llm_version": llm_version, "doc": doc, "stage": stage,
+                       "upload_sec": 0.0, "generate_sec": 0.0, "input_tokens": 0, "output_tokens": 0, "retries": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.values["ok"] = exc_type is None
+        if exc is not None:
+            self.values["error"] = f"{exc_type.__name__}: {str(exc)[:200]}"
+        self.telemetry.record(self.values)
+        return False
+
+    def timer(self, name:str):
+        """구간 시간 측정 - with record.timer("upload_sec"): ..."""
+        record = self
+
+        class _Timer:
+            def __enter__(self):
+                self.start = time.perf_counter()
+
+            def __exit__(self, *exc):
+                record.values[name] += time.perf_counter() - self.start
+                return False
+
+        return _Timer()
+
+    def retry(self):
+        self.values["retries"] += 1
+
+    def set_usage(self, response):
+        """응답의 usage_metadata(객체 또는 배치 결과의 usageMetadata dict)에서 토큰 수 기록"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+        elif isinstance(response, dict):
+            usage = {re.sub(r"(?<!^)(?=[A-Z])", "_", k).lower(): v for k, v in response.get("usageMetadata", {}).items()}
+        usage = usage or {}
+
+        self.values["input_tokens"] = usage.get("prompt_token_count") or 0
+        self.values["output_tokens"] = (usage.get("candidates_token_count") or 0) + (usage.get("thoughts_token_count") or 0)
+
+
+class LLMTelemetry:
+    """
+    LLM 호출별 업로드/생성 시간, 입출력 토큰, 재시도, 예상 비용 기록.
+    호출마다 metrics_path(JSONL)에 한 줄씩 추가하고, 모델별 히스토그램은 write_summary()로 저장.
+    """
+    def __init__(self, metrics_path:str="llm_metrics.jsonl", prices:dict=None):
+        """
+        Args:
+            metrics_path (str): 호출별 기록 파일 경로 (None 시 파일 기록 없이 집계만)
+            prices (dict): 모델 버전 -> (입력, 출력) 100만 토큰당 가격 (None 시 LLM_PRICES)
+        """
+        self.metrics_path = metrics_path
+        self.prices = prices if prices is not None else LLM_PRICES
+        self.models = {}  # "llm_type-llm_version" -> 집계
+        self.lock = threading.Lock()
+
+    def call(self, llm_type:str, llm_version:str, doc:str=None, stage:str="extract") -> LLMCallRecord:
+        """
+        Args:
+            llm_type (str): LLM 종류
+            llm_version (str): LLM 버전
+            doc (str): 참고문서 파일명 (묶음 요청은 쉼표로 연결)
+            stage (str): 호출 단계 - extract, reask, packed, batch
+        Returns: with 블록용 호출 기록 객체
+        """
+        return LLMCallRecord(self, llm_type, llm_version, doc, stage)
+
+    def estimate_cost(self, llm_version:str, input_tokens:int, output_tokens:int) -> float|None:
+        price = self.prices.get(llm_version)
+        if price is None:
+            return None
+        return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+    def record(self, values:dict):
+        values["cost_usd"] = self.estimate_cost(values["llm_version"], values["input_tokens"], values["output_tokens"])
+        values["ts"] = datetime.now().isoformat(timespec="seconds")
+        model = f"{values['llm_type']}-{values['llm_version']}"
+
+        with self.lock:
+            agg = self.models.get(model)
+            if agg is None:
+                agg = self.models[model] = {"calls": 0, "errors": 0, "retries": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "stages": {},
+                                            "upload_sec": Histogram(LATENCY_BUCKETS), "generate_sec": Histogram(LATENCY_BUCKETS),
+                                            "input_tokens_hist": Histogram(TOKEN_BUCKETS), "output_tokens_hist": Histogram(TOKEN_BUCKETS)}
+            agg["calls"] += 1
+            agg["errors"] += 0 if values["ok"] else 1
+            agg["retries"] += values["retries"]
+            agg["input_tokens"] += values["input_tokens"]
+            agg["output_tokens"] += values["output_tokens"]
+            agg["cost_usd"] += values["cost_usd"] or 0.0
+            agg["stages"][values["stage"]] = agg["stages"].get(values["stage"], 0) + 1
+            if values["ok"]:
+                agg["upload_sec"].observe(values["upload_sec"])
+                agg["generate_sec"].observe(values["generate_sec"])
+                agg["input_tokens_hist"].observe(values["input_tokens"])
+                agg["output_tokens_hist"].observe(values["output_tokens"])
+
+            if self.metrics_path is not None:
+                with open(self.metrics_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(values, ensure_ascii=False) + "\n")
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {model: {k: v.to_dict() if isinstance(v, Histogram) else (dict(v) if isinstance(v, dict) else v) for k, v in agg.items()}
+                    for model, agg in self.models.items()}
+
+    def write_summary(self, path:str="llm_metrics_summary.json") -> dict:
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+llm_telemetry = LLMTelemetry()
+
+
+# ------------------------------
+# LLM 추출 결과 캐시
+# ------------------------------
+def file_sha256(file_path:str, chunk_size:int=1024 * 1024) -> str:
+    """파일 내용의 SHA-256 해시 (크롤러 PDF_sha256과 동일)"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ExtractionCache:
+    """
+    LLM 추출 결과 디스크 캐시 (SQLite).
+    (PDF 내용 해시, 프롬프트 해시, llm_type, llm_version)이 같으면 LLM 호출 없이 저장된 결과를 반환.
+    """
+    def __init__(self, db_path:str="llm_extraction_cache.sqlite3", max_entries:int=100000, max_age_days:int|float=None):
+        """
+        Args:
+            db_path (str): 캐시 DB 파일 경로
+            max_entries (int): 최대 보관 항목 수 (초과 시 오래 사용하지 않은 항목부터 삭제)
+            max_age_days (int|float): 보관 기간 (일), None 시 기간 제한 없음
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        self.lock = threading.Lock()  # MultiThreadNode 워커 간 공유
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                cache_key TEXT PRIMARY KEY,
+                pdf_hash TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                llm_type TEXT NOT NULL,
+                llm_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+        """)
+        self.conn.commit()
+        self.evict()
+
+    @staticmethod
+    def make_key(pdf_hash:str, prompt:str, llm_type:str, llm_version:str) -> tuple[str, str]:
+        """Returns: (캐시 키, 프롬프트 해시)"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        cache_key = hashlib.sha256("|".join([pdf_hash, prompt_hash, llm_type, llm_version]).encode("utf-8")).hexdigest()
+        return cache_key, prompt_hash
+
+    def get(self, pdf_hash:str, prompt:str, llm_type:str, llm_version:str) -> dict|None:
+        cache_key, _ = self.make_key(pdf_hash, prompt, llm_type, llm_version)
+        with self.lock:
+            row = self.conn.execute("SELECT result, created_at FROM extraction_cache WHERE cache_key = ?;", (cache_key,)).fetchone()
+            if row is None or self.is_expired(row[1]):
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE extraction_cache SET accessed_at = ? WHERE cache_key = ?;", (time.time(), cache_key))
+            self.conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, pdf_hash:str, prompt:str, llm_type:str, llm_version:str, result:dict):
+        cache_key, prompt_hash = self.make_key(pdf_hash, prompt, llm_type, llm_version)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO extraction_cache (cache_key, pdf_hash, prompt_hash, llm_type, llm_version, result, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+            """, (cache_key, pdf_hash, prompt_hash, llm_type, llm_version, json.dumps(result, ensure_ascii=False), now, now))
+            self.conn.commit()
+            self.puts += 1
+            do_evict = self.puts % 100 == 0
+        if do_evict:
+            self.evict()
+
+    def is_expired(self, created_at:float) -> bool:
+        return self.max_age_days is not None and created_at < time.time() - self.max_age_days * 86400
+
+    def evict(self):
+        """보관 기간이 지난 항목과 max_entries를 넘는 오래 사용하지 않은 항목을 삭제"""
+        with self.lock:
+            if self.max_age_days is not None:
+                self.conn.execute("DELETE FROM extraction_cache WHERE created_at < ?;", (time.time() - self.max_age_days * 86400,))
+            if self.max_entries is not None:
+                self.conn.execute("""
+                    DELETE FROM extraction_cache WHERE cache_key IN (
+                        SELECT cache_key FROM extraction_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    );
+                """, (self.max_entries,))
+            self.conn.commit()
+
+
+# ------------------------------
+# Gemini 공용 자원 (클라이언트, 업로드 파일)
+# ------------------------------
+class GeminiClientPool:
+    """API 키별 genai.Client를 재사용 (MultiThreadNode 워커 간 공유)"""
+    def __init__(self, clients_per_key:int=1):
+        """
+        Args:
+            clients_per_key (int): API 키당 생성할 클라이언트 수 (요청 시 순환 사용)
+        """
+        self.clients_per_key = clients_per_key
+        self.clients = {}  # api_key -> [genai.Client]
+        self.turns = {}  # api_key -> 다음 사용할 인덱스
+        self.lock = threading.Lock()
+
+    def get(self, api_key:str=None) -> genai.Client:
+        with self.lock:
+            if api_key not in self.clients:
+                self.clients[api_key] = [genai.Client(api_key=api_key) for _ in range(self.clients_per_key)]
+                self.turns[api_key] = 0
+            clients = self.clients[api_key]
+            client = clients[self.turns[api_key] % len(clients)]
+            self.turns[api_key] += 1
+            return client
+
+
+class GeminiFileCache:
+    """
+    PDF 파일 파트 준비: 작은 PDF는 inline(Part.from_bytes), 큰 PDF는 업로드 후 핸들 재사용.
+    업로드 핸들은 (API 키, PDF 내용 해시)로 보관하고 서버 측 만료 시각 전까지만 사용.
+    """
+    def __init__(self, inline_max_bytes:int=5 * 1024 * 1024, expiry_margin_sec:int=600):
+        """
+        Args:
+            inline_max_bytes (int): 이 크기 이하의 PDF는 업로드 없이 요청에 직접 포함
+            expiry_margin_sec (int): 만료 시각까지 남은 시간이 이보다 짧으면 다시 업로드
+        """
+        self.inline_max_bytes = inline_max_bytes
+        self.expiry_margin_sec = expiry_margin_sec
+        self.uploads = {}  # (api_key, pdf_hash) -> 업로드 파일 핸들
+        self.lock = threading.Lock()
+
+    def get_part(self, client:genai.Client, api_key:str, file_path:str, pdf_hash:str=None, force_upload:bool=False):
+        """
+        generate_content의 contents에 넣을 PDF 파트를 반환
+
+        Args:
+            force_upload (bool): 크기와 관계없이 업로드 핸들 사용 (요청 전체의 inline 용량이 부족할 때)
+        """
+        if not force_upload and os.path.getsize(file_path) <= self.inline_max_bytes:
+            with open(file_path, "rb") as f:
+                return types.Part.from_bytes(data=f.read(), mime_type="application/pdf")
+
+        key = (api_key, pdf_hash if pdf_hash is not None else file_sha256(file_path))
+        with self.lock:
+            uploaded = self.uploads.get(key)
+        if uploaded is not None and not self.is_expiring(uploaded):
+            return uploaded
+
+        uploaded = client.files.upload(file=file_path)
+        with self.lock:
+            self.uploads[key] = uploaded
+        return uploaded
+
+    def invalidate(self, api_key:str, pdf_hash:str):
+        """서버에서 삭제된 업로드 핸들 제거"""
+        with self.lock:
+            self.uploads.pop((api_key, pdf_hash), None)
+
+    def is_expiring(self, uploaded) -> bool:
+        expiration_time = getattr(uploaded, "expiration_time", None)
+        if expiration_time is None:
+            return False
+        return expiration_time - timedelta(seconds=self.expiry_margin_sec) <= datetime.now(timezone.utc)
+
+
+gemini_client_pool = GeminiClientPool()
+gemini_file_cache = GeminiFileCache()
+
+
+# ------------------------------
+# API 키별 요청 한도 스케줄링 (RPM/TPM)
+# ------------------------------
+def load_api_keys(env_prefixes:list|tuple=("GEMINI_API_KEY_", "GOOGLE_API_KEY")) -> list[str]:
+    """
+    환경 변수에서 사용할 API 키 목록을 수집 (중복 키 제거)
+
+    Args:
+        env_prefixes (list|tuple): 키 이름 접두어 - GEMINI_API_KEY_01, GEMINI_API_KEY_02, GOOGLE_API_KEY ...
+    Returns: API 키 목록 (list)
+    """
+    api_keys = []
+    for prefix in env_prefixes:
+        for name in sorted(k for k in os.environ if k.startswith(prefix)):
+            value = os.getenv(name)
+            if value and value not in api_keys:
+                api_keys.append(value)
+
+    return api_keys
+
+
+class ApiKeyBudget:
+    """단일 API 키의 최근 1분간 요청 수/토큰 수 기록"""
+    def __init__(self, api_key:str, rpm:int, tpm:int, window_sec:int|float=60):
+        self.api_key = api_key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window_sec = window_sec
+        self.window = deque()  # [시각, 토큰 수] - 응답 후 실제 토큰 수로 갱신
+        self.cooldown_until = 0.0  # 429 응답 후 사용 중지 시각
+        self.requests = 0
+        self.rate_limited = 0
+
+    def trim(self, now:float):
+        while self.window and self.window[0][0] <= now - self.window_sec:
+            self.window.popleft()
+
+    def headroom(self, now:float, tokens:int) -> float:
+        """요청 후 남는 한도 비율 (0~1, 음수면 지금 요청 불가)"""
+        self.trim(now)
+        if now < self.cooldown_until:
+            return -1.0
+
+        used_tokens = sum(entry[1] for entry in self.window)
+        request_room = (self.rpm - len(self.window) - 1) / self.rpm
+        token_room = (self.tpm - used_tokens - tokens) / self.tpm
+        if len(self.window) == 0:  # 한도보다 큰 단일 요청도 빈 창에서는 허용
+            token_room = max(token_room, 0.0)
+
+        return min(request_room, token_room)
+
+    def next_ready(self, now:float) -> float:
+        """한도가 풀리는 가장 빠른 시각"""
+        if now < self.cooldown_until:
+            return self.cooldown_until
+        if self.window:
+            return self.window[0][0] + self.window_sec
+        return now
+
+    def reserve(self, now:float, tokens:int) -> list:
+        entry = [now, tokens]
+        self.window.append(entry)
+        self.requests += 1
+        return entry
+
+
+class ApiKeyScheduler:
+    """요청마다 한도 여유가 가장 많은 API 키를 배정 (여유가 없으면 대기)"""
+    def __init__(self, api_keys:list|tuple, rpm:int=10, tpm:int=250000, cooldown_sec:int|float=30):
+        """
+        Args:
+            api_keys (list|tuple): 사용할 API 키 목록
+            rpm (int): 키당 분당 요청 수 한도
+            tpm (int): 키당 분당 토큰 수 한도
+            cooldown_sec (int|float): 429 응답에 재시도 지연 정보가 없을 때 해당 키 사용 중지 시간 (초)
+        """
+        if not api_keys:
+            raise ValueError("사용 가능한 API 키가 없습니다.")
+
+        self.budgets = [ApiKeyBudget(api_key, rpm, tpm) for api_key in api_keys]
+        self.cooldown_sec = cooldown_sec
+        self.lock = threading.Lock()  # 대기 없는 짧은 구간만 보호 (여러 이벤트 루프에서 재사용 가능)
+
+    async def acquire(self, tokens:int) -> tuple[ApiKeyBudget, list]:
+        """
+        API 키 배정
+
+        Args:
+            tokens (int): 예상 토큰 수
+        Returns: (배정된 키의 ApiKeyBudget, 사용량 기록 항목)
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                budget = max(self.budgets, key=lambda b: b.headroom(now, tokens))
+                if budget.headroom(now, tokens) >= 0:
+                    return budget, budget.reserve(now, tokens)
+                wait = min(b.next_ready(now) for b in self.budgets) - now
+
+            await asyncio.sleep(max(wait, 0.05))
+
+    def settle(self, entry:list, tokens:int):
+        """응답의 실제 토큰 수로 사용량 기록 보정"""
+        entry[1] = tokens
+
+    def penalize(self, budget:ApiKeyBudget, retry_after:int|float=None):
+        """429 응답을 받은 키를 일정 시간 배정 대상에서 제외"""
+        budget.rate_limited += 1
+        delay = retry_after if retry_after is not None else self.cooldown_sec
+        budget.cooldown_until = max(budget.cooldown_until, time.monotonic() + delay)
+
+    def stats(self) -> dict:
+        return {budget.api_key[-4:]: {"requests": budget.requests, "rate_limited": budget.rate_limited} for budget in self.budgets}
+
+
+# ------------------------------
+# 배치 작업 백엔드 (대량 백필용)
+# ------------------------------
+BATCH_DONE_STATES = ("JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+
+class GeminiBatchBackend:
+    """Gemini Batch API: 요청 JSONL 업로드 → 배치 작업 생성 → 상태 조회 → 결과 JSONL 다운로드"""
+    def __init__(self, api_key:str=None, client_pool:GeminiClientPool=None):
+        self.api_key = api_key
+        self.client = (client_pool if client_pool is not None else gemini_client_pool).get(api_key)
+
+    def upload_pdf(self, file_path:str) -> str:
+        uploaded = self.client.files.upload(file=file_path, config=types.UploadFileConfig(mime_type="application/pdf"))
+        return uploaded.uri
+
+    def submit(self, model:str, requests_path:str, display_name:str) -> str:
+        src = self.client.files.upload(file=requests_path, config=types.UploadFileConfig(display_name=display_name, mime_type="jsonl"))
+        job = self.client.batches.create(model=model, src=src.name, config={"display_name": display_name})
+        return job.name
+
+    def get_state(self, job_name:str) -> str:
+        return self.client.batches.get(name=job_name).state.name
+
+    def fetch_results(self, job_name:str) -> list[str]:
+        job = self.client.batches.get(name=job_name)
+        content = self.client.files.download(file=job.dest.file_name)
+        return content.decode("utf-8").splitlines()
+
+
+class LocalBatchBackend:
+    """
+    오프라인 테스트용 배치 엔드포인트. GeminiBatchBackend와 같은 입출력 형식을 로컬 디렉토리로 흉내냄.
+    작업은 백그라운드 스레드에서 responder(file_path, prompt) -> 응답 텍스트 로 처리.
+    """
+    def __init__(self, root:str="local_batch_jobs", responder=None, delay_sec:int|float=0):
+        """
+        Args:
+            root (str): 작업 파일 저장 디렉토리
+            responder (callable): (PDF 경로, 프롬프트)를 받아 모델 응답 텍스트를 반환 (None 시 "{}")
+            delay_sec (int|float): 작업 시작 전 대기 시간 (폴링 테스트용)
+        """
+        self.root = root
+        self.responder = responder if responder is not None else (lambda file_path, prompt: "{}")
+        self.delay_sec = delay_sec
+        self.threads = {}
+        os.makedirs(self.root, exist_ok=True)
+
+    def upload_pdf(self, file_path:str) -> str:
+        return "file://" + os.path.abspath(file_path)
+
+    def submit(self, model:str, requests_path:str, display_name:str) -> str:
+        job_name = f"batches/{display_name}-{int(time.time() * 1000)}"
+        job_dir = self.job_dir(job_name)
+        os.makedirs(job_dir, exist_ok=True)
+        shutil.copyfile(requests_path, os.path.join(job_dir, "requests.jsonl"))
+        self.set_state(job_name, "JOB_STATE_PENDING")
+        self.start(job_name)
+        return job_name
+
+    def get_state(self, job_name:str) -> str:
+        with open(os.path.join(self.job_dir(job_name), "state"), encoding="utf-8") as f:
+            state = f.read().strip()
+        # 이전 프로세스에서 처리 중 중단된 작업은 다시 실행
+        if state not in BATCH_DONE_STATES and job_name not in self.threads:
+            self.start(job_name)
+        return state
+
+    def fetch_results(self, job_name:str) -> list[str]:
+        with open(os.path.join(self.job_dir(job_name), "results.jsonl"), encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def job_dir(self, job_name:str) -> str:
+        return os.path.join(self.root, job_name.split("/", 1)[-1])
+
+    def set_state(self, job_name:str, state:str):
+        state_path = os.path.join(self.job_dir(job_name), "state")
+        with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(state)
+        os.replace(state_path + ".tmp", state_path)
+
+    def start(self, job_name:str):
+        thread = threading.Thread(target=self.run_job, args=(job_name,), daemon=True)
+        self.threads[job_name] = thread
+        thread.start()
+
+    def run_job(self, job_name:str):
+        time.sleep(self.delay_sec)
+        self.set_state(job_name, "JOB_STATE_RUNNING")
+        job_dir = self.job_dir(job_name)
+
+        with open(os.path.join(job_dir, "requests.jsonl"), encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+
+        results = []
+        for line in lines:
+            parts = line["request"]["contents"][0]["parts"]
+            file_uri = next(p["file_data"]["file_uri"] for p in parts if "file_data" in p)
+            prompt = next(p["text"] for p in parts if "text" in p)
+            try:
+                text = self.responder(file_uri.removeprefix("file://"), prompt)
+                results.append({"key": line["key"], "response": {"candidates": [{"content": {"parts": [{"text": text}]}}]}})
+            except Exception as e:
+                results.append({"key": line["key"], "error": {"message": str(e)}})
+
+        with open(os.path.join(job_dir, "results.jsonl"), "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.set_state(job_name, "JOB_STATE_SUCCEEDED")
+
+
+# ------------------------------
+# 로컬 모델(Ollama) 임베딩 캐시
+# ------------------------------
+class EmbeddingCache:
+    """(임베딩 모델, 텍스트 해시) -> 임베딩 벡터를 SQLite에 저장 (재실행/모델 비교 시 재계산 생략)"""
+    def __init__(self, db_path:str="ollama_embedding_cache.sqlite3"):
+        """
+        Args:
+            db_path (str): 캐시 DB 파일 경로
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def text_hash(text:str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model:str, texts:list[str]) -> dict:
+        """
+        Args:
+            model (str): 임베딩 모델명
+            texts (list[str]): 조회할 텍스트 목록
+        Returns: {텍스트 해시: 벡터(np.float32)} - 캐시에 있는 항목만
+        """
+        hashes = list({self.text_hash(t) for t in texts})
+        found = {}
+        with self.lock:
+            for i in range(0, len(hashes), 500):  # SQLite 변수 개수 제한
+                part = hashes[i:i + 500]
+                rows = self.conn.execute(f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                                         [model, *part]).fetchall()
+                found.update({h: np.frombuffer(v, dtype=np.float32) for h, v in rows})
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, model:str, texts:list[str], vectors:list|np.ndarray):
+        rows = [(model, self.text_hash(t), len(v), np.asarray(v, dtype=np.float32).tobytes()) for t, v in zip(texts, vectors)]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings (model, text_hash, dim, vector) VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+
+class OllamaClientPool:
+    """Ollama 서버 주소별 ollama.Client 재사용 (워커 스레드 간 연결 풀 공유)"""
+    def __init__(self):
+        self.clients = {}  # host -> ollama.Client
+        self.lock = threading.Lock()
+
+    def get(self, host:str=None) -> ollama.Client:
+        with self.lock:
+            if host not in self.clients:
+                self.clients[host] = ollama.Client(host=host)
+            return self.clients[host]
+
+
+ollama_client_pool = OllamaClientPool()
+
+
+class OllamaEmbedder:
+    """Ollama 임베딩 - 캐시에 없는 텍스트만 batch_size 단위 embed 요청으로 계산, 고정 질문 임베딩은 모델별 1회만 계산"""
+    def __init__(self, model:str, cache:EmbeddingCache=None, client:ollama.Client=None, batch_size:int=256, keep_alive:str|float="30m"):
+        """
+        Args:
+            model (str): Ollama 임베딩 모델명
+            cache (EmbeddingCache): 임베딩 캐시 (None 시 질문 임베딩만 메모리에 보관)
+            client (ollama.Client): Ollama 클라이언트 (None 시 공용 풀의 기본 클라이언트)
+            batch_size (int): embed 요청 1회에 보낼 최대 텍스트 수
+            keep_alive (str|float): 요청 후 모델을 메모리에 유지할 시간 (모델 재적재 방지)
+        """
+        self.model = model
+        self.cache = cache
+        self.client = client if client is not None else ollama_client_pool.get()
+        self.batch_size = batch_size
+        self.keep_alive = keep_alive
+        self.question_vectors = {}  # 질문 목록(tuple) -> 정규화된 (질문 수, dim) 행렬
+        self.lock = threading.Lock()
+
+    def embed(self, texts:list[str]) -> np.ndarray:
+        """
+        Args:
+            texts (list[str]): 임베딩할 텍스트 목록
+        Returns: (len(texts), dim) 벡터 배열
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        found = self.cache.get_many(self.model, texts) if self.cache is not None else {}
+        missing = list(dict.fromkeys(t for t in texts if EmbeddingCache.text_hash(t) not in found))
+        if missing:
+            vectors = []
+            for i in range(0, len(missing), self.batch_size):
+                vectors.extend(self.client.embed(model=self.model, input=missing[i:i + self.batch_size], keep_alive=self.keep_alive)["embeddings"])
+            if self.cache is not None:
+                self.cache.put_many(self.model, missing, vectors)
+            found.update({EmbeddingCache.text_hash(t): np.asarray(v, dtype=np.float32) for t, v in zip(missing, vectors)})
+
+        return np.stack([found[EmbeddingCache.text_hash(t)] for t in texts])
+
+    def embed_questions(self, questions:list[str]) -> np.ndarray:
+        """고정 질문 목록의 정규화된 임베딩 행렬 (질문 목록별 1회만 계산)"""
+        key = tuple(questions)
+        with self.lock:
+            if key not in self.question_vectors:
+                self.question_vectors[key] = normalize_rows(self.embed(list(questions)))
+            return self.question_vectors[key]
+
+
+def iter_pdf_pages(pdf_path:str, max_pages:int=None):
+    """PDF 페이지 텍스트를 한 페이지씩 생성 (처리한 페이지의 파싱 캐시는 바로 해제)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            yield page.extract_text() or ""
+            page.close()
+
+
+def pdf_to_pages(pdf_path:str, max_pages:int=None) -> list[str]:
+    """PDF 페이지별 텍스트 목록"""
+    return list(iter_pdf_pages(pdf_path, max_pages))
+
+
+def pdf_to_text(pdf_path:str, max_pages:int=None) -> str:
+    return "\n".join(iter_pdf_pages(pdf_path, max_pages)) + "\n"
+
+
+class PdfTextCache:
+    """PDF 내용 해시(SHA-256)별 페이지 텍스트 저장 (<root>/<해시 앞 2자리>/<해시>.json)"""
+    def __init__(self, root:str="pdf_text_cache"):
+        """
+        Args:
+            root (str): 캐시 디렉토리 경로
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, pdf_hash:str) -> str:
+        return os.path.join(self.root, pdf_hash[:2], f"{pdf_hash}.json")
+
+    def get(self, pdf_hash:str, max_pages:int=None) -> list[str]|None:
+        """캐시된 페이지가 요청 범위를 모두 포함할 때만 반환"""
+        try:
+            with open(self.path(pdf_hash), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        pages = entry["pages"]
+        if entry["complete"] or (max_pages is not None and len(pages) >= max_pages):
+            return pages[:max_pages]
+        return None
+
+    def put(self, pdf_hash:str, pages:list[str], complete:bool):
+        """
+        Args:
+            pdf_hash (str): PDF 내용 해시
+            pages (list[str]): 페이지 텍스트 목록
+            complete (bool): 모든 페이지를 추출했는지 여부 (페이지 제한으로 일부만 추출 시 False)
+        """
+        path = self.path(pdf_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"pages": pages, "complete": complete}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def get_pdf_pages(file_path:str, cache:PdfTextCache=None, max_pages:int=None) -> list[str]:
+    """캐시를 거쳐 PDF 페이지 텍스트 조회 (없으면 현재 프로세스에서 추출 후 저장)"""
+    if cache is None:
+        return pdf_to_pages(file_path, max_pages)
+
+    pdf_hash = file_sha256(file_path)
+    pages = cache.get(pdf_hash, max_pages)
+    if pages is None:
+        pages, complete = extract_pdf_pages(file_path, max_pages)
+        cache.put(pdf_hash, pages, complete)
+    return pages
+
+
+def split_text_spans(text:str, chunk_size:int=300, chunk_overlap:int=50) -> list[tuple[int, str]]:
+    """
+    문단/줄/공백 경계 우선으로 chunk_size 이하 청크로 분할 (앞 청크 끝 chunk_overlap 글자 중복)
+
+    Returns: (텍스트 내 시작 위치, 청크) 목록
+    """
+    spans, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for sep in ("\n\n", "\n", " "):
+                cut = text.rfind(sep, start + chunk_overlap + 1, end)
+                if cut > start:
+                    end = cut
+                    break
+        raw = text[start:end]
+        chunk = raw.strip()
+        if chunk:
+            spans.append((start + len(raw) - len(raw.lstrip()), chunk))
+        if end >= len(text):
+            break
+        start = max(end - chunk_overlap, start + 1)
+    return spans
+
+
+def split_text(text:str, chunk_size:int=300, chunk_overlap:int=50) -> list[str]:
+    return [chunk for _, chunk in split_text_spans(text, chunk_size, chunk_overlap)]
+
+
+def split_pages(pages:list[str], chunk_size:int=300, chunk_overlap:int=50) -> tuple[list[str], list[tuple[int, int]]]:
+    """
+    페이지별로 청크 분할
+
+    Returns: (청크 목록, 청크별 (페이지 번호(1부터), 페이지 내 시작 위치) 목록)
+    """
+    chunks, positions = [], []
+    for page_num, page in enumerate(pages, start=1):
+        for offset, chunk in split_text_spans(page, chunk_size, chunk_overlap):
+            chunks.append(chunk)
+            positions.append((page_num, offset))
+    return chunks, positions
+
+
+def normalize_rows(matrix:np.ndarray) -> np.ndarray:
+    """행 단위 L2 정규화 float32 행렬 (영벡터는 0 유지)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class ChunkRetriever:
+    """문서 청크 임베딩을 정규화된 float32 행렬 하나로 보관하고, 여러 질문의 top-k 청크를 한 번의 행렬곱으로 검색"""
+    def __init__(self, vectors:np.ndarray):
+        """
+        Args:
+            vectors (np.ndarray): (청크 수, dim) 청크 임베딩
+        """
+        self.matrix = normalize_rows(vectors)
+
+    def search(self, queries:np.ndarray, k:int=2) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Args:
+            queries (np.ndarray): (질문 수, dim) 정규화된 질문 임베딩
+            k (int): 질문별 검색 청크 수
+        Returns: (질문 수, k) 청크 인덱스와 코사인 유사도 (유사도 내림차순)
+        """
+        scores = queries @ self.matrix.T  # (질문 수, 청크 수)
+        k = min(k, scores.shape[1])
+        if k == 0:
+            empty = np.zeros((scores.shape[0], 0))
+            return empty.astype(np.int64), empty
+
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]  # 상위 k개 (순서 미정렬)
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)  # k개만 정렬
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+# ------------------------------
+# 리포트 간 벡터 색인 (메모리 매핑)
+# ------------------------------
+class ReportVectorIndex:
+    """
+    처리한 모든 리포트 청크의 임베딩 색인.
+    벡터는 추가 전용 float32 파일(vectors.f32)을 np.memmap으로 열어 필요한 부분만 읽고,
+    청크 메타데이터(pdf_file, pdf_hash, page, offset)는 SQLite(meta.sqlite3)에 행 번호로 저장.
+    리포트는 PDF 내용 해시로 구분하므로 카테고리 디렉토리가 달라 파일명이 같은 리포트도 각각 색인됨.
+    기본은 블록 단위 전수 검색, build_ivf() 이후에는 IVF(클러스터 nprobe개만 검색) 사용 가능.
+    """
+    def __init__(self, root:str="report_vector_index", model:str=None, block_rows:int=65536):
+        """
+        Args:
+            root (str): 색인 디렉토리 경로
+            model (str): 임베딩 모델명 (기존 색인과 다르면 오류 - 모델마다 벡터 공간이 다름)
+            block_rows (int): 전수 검색/클러스터 배정 시 한 번에 읽을 행 수
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.vectors_path = os.path.join(root, "vectors.f32")
+        self.centroids_path = os.path.join(root, "ivf_centroids.npy")
+        self.block_rows = block_rows
+        self.lock = threading.RLock()
+
+        self.conn = sqlite3.connect(os.path.join(root, "meta.sqlite3"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                pdf_file TEXT NOT NULL,
+                pdf_hash TEXT,
+                page INTEGER,
+                offset INTEGER,
+                list_id INTEGER
+            )
+        """)
+        if "pdf_hash" not in [c[1] for c in self.conn.execute("PRAGMA table_info(chunks)")]:
+            self.conn.execute("ALTER TABLE chunks ADD COLUMN pdf_hash TEXT")  # 파일명 기준으로 만든 이전 색인
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_pdf_file ON chunks (pdf_file)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_pdf_hash ON chunks (pdf_hash)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_list_id ON chunks (list_id)")
+        self.conn.commit()
+
+        info = dict(self.conn.execute("SELECT key, value FROM info").fetchall())
+        self.dim = int(info["dim"]) if "dim" in info else None
+        self.model = info.get("model")
+        if model is not None and self.model is not None and model != self.model:
+            raise ValueError(f"색인 임베딩 모델 불일치: {self.model} (요청: {model})")
+        if model is not None and self.model is None:
+            self.model = model
+            self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('model', ?)", (model,))
+            self.conn.commit()
+
+        self.size = self.conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        if self.dim is not None and os.path.exists(self.vectors_path):
+            # 메타데이터 기록 전에 중단된 추가분(벡터만 기록된 꼬리) 제거
+            expected = self.size * self.dim * 4
+            if os.path.getsize(self.vectors_path) > expected:
+                os.truncate(self.vectors_path, expected)
+
+        self.centroids = np.load(self.centroids_path) if os.path.exists(self.centroids_path) else None
+        self.mapped = None  # 현재 크기의 memmap (추가 시 다시 열기)
+
+    def matrix(self) -> np.ndarray:
+        with self.lock:
+            if self.mapped is None or len(self.mapped) != self.size:
+                self.mapped = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.size, self.dim)) if self.size else \
+                              np.zeros((0, self.dim or 0), dtype=np.float32)
+            return self.mapped
+
+    def contains(self, pdf_file:str, pdf_hash:str=None) -> bool:
+        """
+        Args:
+            pdf_file (str): 리포트 PDF 경로
+            pdf_hash (str): PDF 내용 해시 (None 시 pdf_file에서 계산)
+        """
+        pdf_hash = pdf_hash if pdf_hash is not None else file_sha256(pdf_file)
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM chunks WHERE pdf_hash = ? LIMIT 1", (pdf_hash,)).fetchone() is not None
+
+    def add(self, pdf_file:str, vectors:np.ndarray, positions:list[tuple[int, int]], model:str=None, pdf_hash:str=None) -> int:
+        """
+        리포트 1건의 청크 임베딩 추가 (같은 내용의 리포트가 이미 색인되어 있으면 생략)
+
+        Args:
+            pdf_file (str): 리포트 PDF 경로 (검색 결과의 pdf_file로 반환)
+            vectors (np.ndarray): (청크 수, dim) 청크 임베딩
+            positions (list[tuple[int, int]]): 청크별 (페이지 번호, 페이지 내 시작 위치)
+            model (str): 임베딩 모델명 (색인 모델과 다르면 오류)
+            pdf_hash (str): PDF 내용 해시 (None 시 pdf_file에서 계산)
+        Returns: 추가된 행 수
+        """
+        vectors = normalize_rows(vectors)
+        if len(vectors) == 0:
+            return 0
+        pdf_hash = pdf_hash if pdf_hash is not None else file_sha256(pdf_file)
+
+        with self.lock:
+            if model is not None and self.model is not None and model != self.model:
+                raise ValueError(f"색인 임베딩 모델 불일치: {self.model} (요청: {model})")
+            if self.contains(pdf_file, pdf_hash):
+                return 0
+            prev_model, prev_dim = self.model, self.dim
+            if model is not None and self.model is None:
+                self.model = model
+                self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('model', ?)", (model,))
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self.conn.execute("INSERT OR REPLACE INTO info (key, value) VALUES ('dim', ?)", (str(self.dim),))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원 불일치: {vectors.shape[1]} (색인: {self.dim})")
+
+            # 벡터 먼저 기록 후 메타데이터 커밋 - 중간에 중단되면 다음 열기 때 꼬리 벡터를 잘라냄
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            try:
+                list_ids = self.assign(vectors).tolist() if self.centroids is not None else [None] * len(vectors)
+                self.conn.executemany("INSERT INTO chunks (row, pdf_file, pdf_hash, page, offset, list_id) VALUES (?, ?, ?, ?, ?, ?)",
+                                      [(self.size + i, pdf_file, pdf_hash, page, offset, list_id)
+                                       for i, ((page, offset), list_id) in enumerate(zip(positions, list_ids))])
+                self.conn.commit()
+            except Exception:
+                # 메타데이터 기록 실패 시 방금 기록한 벡터를 바로 잘라내 이후 추가분의 행 번호가 어긋나지 않도록 함
+                self.conn.rollback()
+                os.truncate(self.vectors_path, self.size * vectors.shape[1] * 4)
+                self.model, self.dim = prev_model, prev_dim
+                raise
+            self.size += len(vectors)
+            return len(vectors)
+
+    def search(self, queries:np.ndarray, k:int=10, nprobe:int=None) -> list[list[dict]]:
+        """
+        Args:
+            queries (np.ndarray): (질문 수, dim) 또는 (dim,) 질문 임베딩
+            k (int): 질문별 결과 수
+            nprobe (int): IVF 검색 시 살펴볼 클러스터 수 (None 또는 IVF 미구축 시 전수 검색)
+        Returns: 질문별 [{"pdf_file", "page", "offset", "score"}] (유사도 내림차순)
+        """
+        queries = normalize_rows(np.atleast_2d(queries))
+        if self.size == 0:
+            return [[] for _ in queries]
+
+        if nprobe is not None and self.centroids is not None:
+            results = [self.search_ivf(q, k, nprobe) for q in queries]
+        else:
+            results = list(zip(*self.search_flat(queries, k)))
+        return [self.describe(rows, scores) for rows, scores in results]
+
+    def search_flat(self, queries:np.ndarray, k:int) -> tuple[np.ndarray, np.ndarray]:
+        """memmap을 block_rows 단위로 읽으며 질문별 top-k 유지"""
+        matrix = self.matrix()
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+
+        for start in range(0, self.size, self.block_rows):
+            block = np.asarray(matrix[start:start + self.block_rows])
+            scores = np.concatenate([best_scores, queries @ block.T], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, start + len(block)), (len(queries), len(block)))], axis=1)
+            if scores.shape[1] > k:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores, rows = np.take_along_axis(scores, top, axis=1), np.take_along_axis(rows, top, axis=1)
+            best_scores, best_rows = scores, rows
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def search_ivf(self, query:np.ndarray, k:int, nprobe:int) -> tuple[np.ndarray, np.ndarray]:
+        lists = np.argsort(-(self.centroids @ query))[:nprobe]
+        with self.lock:
+            rows = np.array([r for (r,) in self.conn.execute(
+                f"SELECT row FROM chunks WHERE list_id IN ({','.join('?' * len(lists))}) ORDER BY row", lists.tolist())], dtype=np.int64)
+        if len(rows) == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+
+        scores = np.asarray(self.matrix()[rows]) @ query  # 후보 행만 읽음
+        top = np.argsort(-scores)[:k] if len(rows) <= k else np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top], scores[top]
+
+    def describe(self, rows:np.ndarray, scores:np.ndarray) -> list[dict]:
+        if len(rows) == 0:
+            return []
+        with self.lock:
+            meta = {r: (pdf_file, page, offset) for r, pdf_file, page, offset in self.conn.execute(
+                f"SELECT row, pdf_file, page, offset FROM chunks WHERE row IN ({','.join('?' * len(rows))})", rows.tolist())}
+        return [{"pdf_file": meta[r][0], "page": meta[r][1], "offset": meta[r][2], "score": float(sc)} for r, sc in zip(rows.tolist(), scores)]
+
+    def assign(self, vectors:np.ndarray) -> np.ndarray:
+        """가장 가까운 IVF 클러스터 번호"""
+        return np.concatenate([np.argmax(vectors[i:i + self.block_rows] @ self.centroids.T, axis=1)
+                               for i in range(0, len(vectors), self.block_rows)]) if len(vectors) else np.zeros(0, dtype=np.int64)
+
+    def build_ivf(self, n_lists:int=None, sample_size:int=100000, iters:int=10, seed:int=0):
+        """
+        표본으로 구면 k-means 클러스터 중심을 학습하고 전체 행을 클러스터에 배정 (이후 추가분은 add 시 배정)
+
+        Args:
+            n_lists (int): 클러스터 수 (None 시 sqrt(행 수))
+            sample_size (int): 학습 표본 행 수
+            iters (int): k-means 반복 횟수
+            seed (int): 난수 시드
+        """
+        with self.lock:
+            matrix = self.matrix()
+            n_lists = n_lists if n_lists is not None else max(1, int(np.sqrt(self.size)))
+            rng = np.random.default_rng(seed)
+            sample = np.asarray(matrix[np.sort(rng.choice(self.size, size=min(sample_size, self.size), replace=False))])
+
+            self.centroids = sample[rng.choice(len(sample), size=min(n_lists, len(sample)), replace=False)].copy()
+            for _ in range(iters):
+                labels = self.assign(sample)
+                sums = np.zeros_like(self.centroids)
+                np.add.at(sums, labels, sample)
+                empty = np.flatnonzero(~sums.any(axis=1))
+                sums[empty] = sample[rng.choice(len(sample), size=len(empty))]  # 빈 클러스터는 임의 표본으로 재시작
+                self.centroids = normalize_rows(sums)
+
+            for start in range(0, self.size, self.block_rows):
+                labels = self.assign(np.asarray(matrix[start:start + self.block_rows]))
+                self.conn.executemany("UPDATE chunks SET list_id = ? WHERE row = ?", [(int(l), start + i) for i, l in enumerate(labels)])
+            self.conn.commit()
+
+            tmp_path = self.centroids_path + ".tmp.npy"
+            np.save(tmp_path, self.centroids)
+            os.replace(tmp_path, self.centroids_path)
+            print(f"[ReportVectorIndex] IVF 구축 완료: 클러스터 {len(self.centroids)}개, 행 {self.size}개")
+
+
+# ------------------------------
+# 규칙 기반 1차 추출 (리포트 1페이지 헤더)
+# ------------------------------
+# 네이버페이 증권 리서치에 리포트를 올리는 증권사/리서치 기관 (옛 사명 포함)
+KNOWN_FIRMS = (
+    "미래에셋증권", "삼성증권", "NH투자증권", "한국투자증권", "KB증권", "키움증권", "신한투자증권", "신한금융투자",
+    "하나증권", "하나금융투자", "메리츠증권", "대신증권", "유안타증권", "교보증권", "하이투자증권", "iM증권",
+    "현대차증권", "LS증권", "이베스트투자증권", "DB금융투자", "DB증권", "한화투자증권", "SK증권", "IBK투자증권",
+    "유진투자증권", "신영증권", "부국증권", "상상인증권", "케이프투자증권", "BNK투자증권", "다올투자증권", "한양증권",
+    "리딩투자증권", "흥국증권", "카카오페이증권", "토스증권", "CGS인터내셔널", "한국IR협의회", "나이스디앤비",
+)
+
+# 공통 규칙: 필드별 정규식 목록 (앞에서부터 첫 매칭 사용, 그룹 1이 값)
+DEFAULT_HEADER_RULES = {
+    "ticker": [
+        r"\(\s*A?(\d{6})\s*(?:\.?K[SQ])?\s*\)",
+        r"종목\s*코드\s*[:：]?\s*A?(\d{6})",
+        r"(?<![\d.,])A?(\d{6})\s*(?:\.|\s)?K[SQ]\b",
+        r"(?<![\w.,])A(\d{6})(?!\d)",
+    ],
+    "stock": [
+        r"([가-힣A-Za-z][가-힣A-Za-z0-9&]*)\s*\(\s*A?\d{6}",
+        r"([가-힣A-Za-z][가-힣A-Za-z0-9&]*)\s+A?\d{6}\s*(?:\.|\s)?K[SQ]\b",
+    ],
+    "target_price": [
+        r"목표\s*주가[^\d\n]{0,12}\n?\s*([\d,]{3,})",
+        r"목표가[^\d\n]{0,12}\n?\s*([\d,]{3,})",
+        r"(?:TP|Target\s*Price)[^\d\n]{0,12}([\d,]{3,})",
+    ],
+    "current_price": [
+        r"현재\s*주가\s*(?:\([^)\n]*\))?[^\d\n]{0,20}\n?\s*([\d,]{3,})",  # 현재주가(3/13) 72,300
+        r"현재가\s*(?:\([^)\n]*\))?[^\d\n]{0,20}\n?\s*([\d,]{3,})",
+        r"(?:전일\s*)?종가\s*(?:\([^)\n]*\))?[^\d\n]{0,20}\n?\s*([\d,]{3,})",
+    ],
+    "investment_opinion": [
+        r"투자\s*의견[^가-힣A-Za-z\n]{0,8}\n?\s*([가-힣]+|[A-Za-z]+(?:\s*Buy)?)",
+        r"(?:Rating|Opinion)[^A-Za-z\n]{0,8}([A-Za-z]+(?:\s*Buy)?)",
+    ],
+    "published_date": [
+        r"(20\d{2})\s*[.\-/년]\s*(\d{1,2})\s*[.\-/월]\s*(\d{1,2})",
+    ],
+    "author": [
+        r"(?:Analyst|애널리스트|연구원)\s*[:：]?\s*([가-힣]{2,4})(?![가-힣])",
+        r"([가-힣]{2,4})\s*(?:Analyst|애널리스트|연구원)(?![가-힣])",
+    ],
+    "firm": [
+        # 알려진 증권사명만 인정 ("유가증권시장" 등 오매칭 방지), 긴 이름 우선
+        r"(?<![가-힣A-Za-z])(" + "|".join(re.escape(firm) for firm in sorted(KNOWN_FIRMS, key=len, reverse=True)) + r")",
+    ],
+}
+
+# 증권사별 규칙: 공통 규칙보다 먼저 시도
+# 헤더 박스의 라벨에 투자기간(12M/12개월)이나 영문 라벨이 붙어 공통 규칙의 "라벨 뒤 첫 숫자"가 기간 숫자에 걸리는 증권사
+TP_12M_RULES = [
+    r"목표\s*주가\s*\(\s*(?:12\s*M|12\s*개월|6\s*M|6\s*개월)[^)\n]*\)[^\d\n]{0,12}\n?\s*([\d,]{3,})",  # 목표주가(12M, 원) 95,000
+    r"(?:12\s*M|12\s*개월)\s*(?:TP|목표\s*주가|목표가)[^\d\n]{0,12}([\d,]{3,})",  # 12M TP 95,000
+]
+FIRM_HEADER_RULES = {
+    firm: {"target_price": TP_12M_RULES}
+    for firm in ("미래에셋증권", "NH투자증권", "한국투자증권", "KB증권", "신한투자증권", "하나증권", "메리츠증권", "대신증권",
+                 "유안타증권", "교보증권", "iM증권", "하이투자증권", "DB금융투자", "DB증권", "LS증권", "이베스트투자증권", "유진투자증권", "삼성증권")
+}
+FIRM_HEADER_RULES["키움증권"] = {
+    "target_price": TP_12M_RULES,
+    "investment_opinion": [r"투자\s*의견\s*\(\s*\d+\s*M\s*\)[^가-힣A-Za-z\n]{0,8}([가-힣]+|[A-Za-z]+(?:\s*Buy)?)"],  # 투자의견(6M) BUY
+}
+
+OPINION_MAP = {
+    "buy": "Buy", "strongbuy": "Buy", "outperform": "Buy", "overweight": "Buy", "매수": "Buy", "적극매수": "Buy", "비중확대": "Buy",
+    "hold": "Hold", "neutral": "Hold", "marketperform": "Hold", "tradingbuy": "Hold", "중립": "Hold", "보유": "Hold",
+    "sell": "Sell", "underperform": "Sell", "underweight": "Sell", "reduce": "Sell", "매도": "Sell", "비중축소": "Sell",
+}
+
+
+def extract_page_text(file_path:str, page_index:int=0) -> str:
+    """PDF 한 페이지의 텍스트 추출 (없으면 빈 문자열)"""
+    with pdfplumber.open(file_path) as pdf:
+        if len(pdf.pages) <= page_index:
+            return ""
+        return pdf.pages[page_index].extract_text() or ""
+
+
+class ReportHeaderParser:
+    """리포트 1페이지 헤더 박스의 종목/가격/의견 정보를 정규식 규칙으로 추출"""
+    def __init__(self, rules:dict=None, firm_rules:dict=None):
+        """
+        Args:
+            rules (dict): 필드명 -> 정규식 목록 (None 시 DEFAULT_HEADER_RULES)
+            firm_rules (dict): 증권사명 -> 필드별 정규식 목록 (None 시 FIRM_HEADER_RULES)
+        """
+        self.rules = {field: [re.compile(p) for p in patterns] for field, patterns in (rules if rules is not None else DEFAULT_HEADER_RULES).items()}
+        self.firm_rules = {firm: {field: [re.compile(p) for p in patterns] for field, patterns in firm_rule.items()}
+                           for firm, firm_rule in (firm_rules if firm_rules is not None else FIRM_HEADER_RULES).items()}
+        # 규칙 집합 버전 - 추출 캐시에서 규칙 결과를 LLM 결과와 구분하고, 규칙이 바뀌면 이전 결과 무효화
+        patterns = [{field: [p.pattern for p in ps] for field, ps in self.rules.items()},
+                    {firm: {field: [p.pattern for p in ps] for field, ps in rule.items()} for firm, rule in self.firm_rules.items()}]
+        self.version = hashlib.sha256(json.dumps(patterns, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+    def __call__(self, file_path:str) -> dict:
+        """
+        Args:
+            file_path (str): PDF 파일 경로
+        Returns: 추출된 필드 (dict) - 찾지 못한 필드는 포함하지 않음
+        """
+        return self.parse(extract_page_text(file_path))
+
+    def parse(self, text:str) -> dict:
+        result = {}
+        firm = self.match("firm", text, self.rules)
+        if firm is not None:
+            result["firm"] = firm
+
+        firm_rule = next((rule for name, rule in self.firm_rules.items() if firm is not None and name in firm), {})
+        for field in self.rules:
+            if field in result:
+                continue
+            value = self.match(field, text, firm_rule)
+            if value is None:
+                value = self.match(field, text, self.rules)
+            if value is not None:
+                result[field] = value
+
+        return result
+
+    def match(self, field:str, text:str, rules:dict):
+        for pattern in rules.get(field, ()):
+            for m in pattern.finditer(text):
+                value = self.normalize(field, m)
+                if value is not None:
+                    return value
+        return None
+
+    def normalize(self, field:str, m:re.Match):
+        """필드별 값 정리 (형식이 맞지 않으면 None - 다음 매칭 시도)"""
+        if field in ("target_price", "current_price"):
+            value = int(m.group(1).replace(",", "") or 0)
+            return value if value >= 100 else None
+        if field == "published_date":
+            try:
+                return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3))).strftime("%Y-%m-%d")
+            except ValueError:
+                return None
+        if field == "investment_opinion":
+            return OPINION_MAP.get(m.group(1).lower().replace(" ", ""))
+        return m.group(1).strip()
+
+
 # ------------------------------
 # 각 노드 정의 및 구현
 # ------------------------------
@@ -319,8 +1594,183 @@ class DocumentsLoader(Node):
 
         return doc_files
 
+class PdfTextExtractor(Node):
+    """
+    여러 PDF의 페이지 텍스트를 프로세스 풀에서 추출 (pdfplumber는 순수 파이썬이라 스레드로는 코어를 활용하지 못함).
+    PdfTextCache를 지정하면 캐시에 있는 문서는 건너뛰고, 추출 결과를 내용 해시별로 저장.
+    spawn 방식(Windows 기본)에서는 작업 프로세스가 실행 스크립트를 다시 import하므로 반드시 if __name__ == "__main__": 블록 안에서 호출.
+    """
+    def __init__(self, docs_dir_path:str, cache:PdfTextCache=None, max_pages:int=None, max_workers:int=None):
+        """
+        Args:
+            docs_dir_path (str): 참고문서 디렉토리 경로
+            cache (PdfTextCache): 페이지 텍스트 캐시 (None 시 미사용)
+            max_pages (int): 문서당 추출할 최대 페이지 수 (None 시 전체)
+            max_workers (int): 프로세스 수 (None 시 CPU 코어 수)
+        """
+        self.docs_dir_path = docs_dir_path
+        self.cache = cache
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+
+    def __call__(self, docs:list|tuple, *args, **kwargs) -> list:
+        """
+        Args:
+            docs (list|tuple): 참고문서 파일명 목록
+        Returns: 참고문서별 페이지 텍스트 목록 (입력 순서 유지, 실패 시 None)
+        """
+        results = dict(self.iter_results(docs))
+        return [results.get(doc) for doc in docs]
+
+    def iter_results(self, docs:list|tuple):
+        """(파일명, 페이지 텍스트 목록)을 추출이 끝나는 순서대로 생성"""
+        todo, cached = {}, 0
+        for doc in docs:
+            file_path = os.path.join(self.docs_dir_path, doc)
+            try:
+                pdf_hash = file_sha256(file_path) if self.cache is not None else None
+            except OSError as e:
+                print(f"[PdfTextExtractor] '{doc}' 처리 중 오류 발생: {e}")
+                yield doc, None
+                continue
+            pages = self.cache.get(pdf_hash, self.max_pages) if self.cache is not None else None
+            if pages is not None:
+                cached += 1
+                yield doc, pages
+            else:
+                todo[doc] = pdf_hash
+
+        if not todo:
+            return
+        if multiprocessing.parent_process() is not None:
+            # 보호 블록 없이 실행된 스크립트를 작업 프로세스가 다시 import하면서 풀을 또 만들려는 경우
+            raise RuntimeError("[PdfTextExtractor] 작업 프로세스에서 호출됨 - 실행 스크립트의 호출부를 if __name__ == \"__main__\": 블록 안으로 옮기세요.")
+        print(f"[PdfTextExtractor] {len(todo)}개 문서 텍스트 추출 중... (캐시 {cached}개)")
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(extract_pdf_pages, os.path.join(self.docs_dir_path, doc), self.max_pages): doc for doc in todo}
+            for future in as_completed(futures):
+                doc = futures[future]
+                try:
+                    pages, complete = future.result()
+                except Exception as e:
+                    print(f"[PdfTextExtractor] '{doc}' 처리 중 오류 발생: {e}")
+                    yield doc, None
+                    continue
+                if self.cache is not None:
+                    self.cache.put(todo[doc], pages, complete)
+                yield doc, pages
+
+
+class PdfSlimmer(Node):
+    """
+    LLM 업로드 전 PDF 축소: 앞 N페이지 + 키워드 포함 페이지만 남기고 내장 이미지를 다운샘플링.
+    축소본은 output_dir에 같은 파일명으로 저장되므로 뒤 노드(LLMFeatsExtractor)의 docs_dir_path를 output_dir로 지정.
+    """
+    def __init__(self, docs_dir_path:str, output_dir:str, first_pages:int=2, keywords:list|tuple=("목표주가", "Target Price", "투자의견", "적정주가"),
+                 max_pages:int=6, max_image_px:int=1024, jpeg_quality:int=60):
+        """
+        Args:
+            docs_dir_path (str): 원본 참고문서 디렉토리 경로
+            output_dir (str): 축소본 저장 디렉토리 경로
+            first_pages (int): 항상 남길 앞쪽 페이지 수
+            keywords (list|tuple): 이 단어가 있는 페이지는 추가로 남김 (공백/대소문자 무시)
+            max_pages (int): 남길 최대 페이지 수
+            max_image_px (int): 이미지 긴 변 최대 픽셀 수 (초과 시 축소)
+            jpeg_quality (int): 이미지 재압축 JPEG 품질
+        """
+        self.docs_dir_path = docs_dir_path
+        self.output_dir = output_dir
+        self.first_pages = first_pages
+        self.keywords = [k.replace(" ", "").lower() for k in keywords]
+        self.max_pages = max_pages
+        self.max_image_px = max_image_px
+        self.jpeg_quality = jpeg_quality
+        self.stats = {}  # 파일명 -> {"pages_total", "pages_kept", "bytes_in", "bytes_out", "slimmed"}
+        self.lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def __call__(self, doc:str, *args, **kwargs) -> str:
+        """
+        Args:
+            doc (str): 단일 참고문서 파일명
+        Returns: 축소본 파일명 (output_dir 기준, 원본과 동일)
+        """
+        src_path = os.path.join(self.docs_dir_path, doc)
+        dst_path = os.path.join(self.output_dir, doc)
+        if os.path.exists(dst_path) and os.path.getmtime(dst_path) >= os.path.getmtime(src_path):
+            return doc  # 이미 축소한 파일
+
+        reader = PdfReader(src_path)
+        keep = self.select_pages(src_path, len(reader.pages))
+
+        writer = PdfWriter()
+        for i in keep:
+            writer.add_page(reader.pages[i])
+        for page in writer.pages:
+            self.downsample_images(page)
+            page.compress_content_streams()
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+
+        tmp_path = dst_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+        slimmed = os.path.getsize(tmp_path) < os.path.getsize(src_path)
+        if not slimmed:  # 축소 효과가 없으면 원본 사용
+            shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, dst_path)
+
+        stat = {"pages_total": len(reader.pages), "pages_kept": len(keep) if slimmed else len(reader.pages),
+                "bytes_in": os.path.getsize(src_path), "bytes_out": os.path.getsize(dst_path), "slimmed": slimmed}
+        with self.lock:
+            self.stats[doc] = stat
+        print(f"[PdfSlimmer] {doc} {stat['pages_kept']}/{stat['pages_total']}페이지, {stat['bytes_in'] // 1024}KB -> {stat['bytes_out'] // 1024}KB"
+              + ("" if slimmed else " (축소 효과 없음, 원본 사용)"))
+        return doc
+
+    def select_pages(self, file_path:str, num_pages:int) -> list[int]:
+        keep = list(range(min(self.first_pages, num_pages)))
+        with pdfplumber.open(file_path) as pdf:
+            for i in range(len(keep), num_pages):
+                if len(keep) >= self.max_pages:
+                    break
+                text = (pdf.pages[i].extract_text() or "").replace(" ", "").replace("\n", "").lower()
+                if any(k in text for k in self.keywords):
+                    keep.append(i)
+        return keep
+
+    def downsample_images(self, page):
+        for image in page.images:
+            try:
+                img = image.image
+                if max(img.size) <= self.max_image_px and image.name.lower().endswith((".jpg", ".jpeg")):
+                    continue  # 이미 작은 JPEG
+                img.thumbnail((self.max_image_px, self.max_image_px))
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                image.replace(img, quality=self.jpeg_quality)
+            except Exception as e:  # 마스크/특수 색공간 이미지는 원본 유지
+                print(f"[PdfSlimmer] 이미지 축소 생략: {e}")
+
+    def summary(self) -> dict:
+        with self.lock:
+            stats = list(self.stats.values())
+        return {
+            "files": len(stats),
+            "slimmed": sum(s["slimmed"] for s in stats),
+            "pages_total": sum(s["pages_total"] for s in stats),
+            "pages_kept": sum(s["pages_kept"] for s in stats),
+            "bytes_in": sum(s["bytes_in"] for s in stats),
+            "bytes_out": sum(s["bytes_out"] for s in stats),
+        }
+
+
 class LLMFeatsExtractor(Node):
-    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, essential_cols:list|tuple=None):
+    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, essential_cols:list|tuple=None,
+                 cache:ExtractionCache=None, client_pool:GeminiClientPool=None, file_cache:GeminiFileCache=None, rule_parser:ReportHeaderParser=None,
+                 response_schema:type[BaseModel]=None, reask:bool=True, telemetry:LLMTelemetry=None,
+                 deadline_sec:int|float=None, hedge:bool=False, hedge_quantile:float=0.95, hedge_delay_sec:int|float=30, hedge_api_keys:list|tuple=None,
+                 embed_model:str=None, embedding_cache:EmbeddingCache=None, vector_index:ReportVectorIndex=None,
+                 text_cache:PdfTextCache=None, max_text_pages:int=None, ollama_host:str=None, keep_alive:str|float="30m"):
         """
         Args:
             docs_dir_path (str): 참고문서 디렉토리 경로 (DocumentsLoader 사용 시 경로 일치 필수)
@@ -329,6 +1779,25 @@ class LLMFeatsExtractor(Node):
             interval (int|float): LLM API 호출 간격 (초)
             api_key (str): LLM API 키 (로컬 모델의 경우 필요 없음)
             essential_cols (list|tuple): 추출 항목 중 필수 항목명
+            cache (ExtractionCache): 추출 결과 캐시 (None 시 미사용)
+            client_pool (GeminiClientPool): Gemini 클라이언트 풀 (None 시 모듈 공용 풀)
+            file_cache (GeminiFileCache): PDF 업로드 핸들 캐시 (None 시 모듈 공용 캐시)
+            rule_parser (ReportHeaderParser): 규칙 기반 1차 추출기 - 필수 항목을 모두 찾으면 LLM 호출 생략 (None 시 미사용)
+            response_schema (type[BaseModel]): 구조화 출력 스키마 - 프롬프트의 JSON 키와 일치해야 함 (예: ReportFields, None 시 텍스트 응답 파싱)
+            reask (bool): 필수 항목 누락 시 누락 항목만 짧은 프롬프트로 재질의
+            telemetry (LLMTelemetry): LLM 호출 계측기 (None 시 모듈 공용 계측기)
+            deadline_sec (int|float): LLM 호출 1회 제한 시간 (초, None 시 제한 없음) - 초과 시 실패 처리
+            hedge (bool): 응답이 늦으면 같은 요청을 한 번 더 보내 먼저 끝난 응답 사용
+            hedge_quantile (float): 중복 요청 대기 시간 기준 분위수 (최근 생성 시간 분포의 p95 등)
+            hedge_delay_sec (int|float): 생성 시간 표본이 충분하지 않을 때 중복 요청 대기 시간 (초)
+            hedge_api_keys (list|tuple): 중복 요청에 사용할 API 키 목록 (None 시 같은 키)
+            embed_model (str): 로컬 모델 RAG의 Ollama 임베딩 모델명 (None 시 생성 모델과 동일)
+            embedding_cache (EmbeddingCache): 청크/질문 임베딩 캐시 (None 시 질문 임베딩만 메모리에 보관)
+            vector_index (ReportVectorIndex): 처리한 리포트 청크 임베딩을 추가할 리포트 간 색인 (None 시 미사용)
+            text_cache (PdfTextCache): 로컬 모델 RAG용 PDF 텍스트 캐시 - PdfTextExtractor로 미리 채워 둘 수 있음 (None 시 미사용)
+            max_text_pages (int): 로컬 모델 RAG에 사용할 최대 페이지 수 (None 시 전체)
+            ollama_host (str): Ollama 서버 주소 (None 시 OLLAMA_HOST 환경 변수 또는 로컬 기본값)
+            keep_alive (str|float): 로컬 모델을 요청 후 메모리에 유지할 시간
         """
         self.docs_dir_path = docs_dir_path
         self.llm_type = llm_type
@@ -337,8 +1806,40 @@ class LLMFeatsExtractor(Node):
         self.interval = interval
         self.api_key = api_key
         self.essential_cols = essential_cols if essential_cols is not None else tuple()
-
-        self.model_map = {"gemini": self.call_gemini,}# "llama": self.call_llama, "qwen": self.call_qwen} # 모델명 + 메소드 매핑
+        self.cache = cache
+        self.client_pool = client_pool if client_pool is not None else gemini_client_pool
+        self.file_cache = file_cache if file_cache is not None else gemini_file_cache
+        self.rule_parser = rule_parser
+        self.rule_hits = 0  # 규칙만으로 추출 완료된 문서 수
+        self.llm_calls = 0
+        self.response_schema = response_schema
+        self.reask = reask
+        self.reask_calls = 0
+        self.telemetry = telemetry if telemetry is not None else llm_telemetry
+        self.deadline_sec = deadline_sec
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay_sec = hedge_delay_sec
+        self.hedge_api_keys = list(hedge_api_keys) if hedge_api_keys else []
+        self.hedge_min_samples = 20
+        self.hedge_min_delay_sec = 1.0  # 분위수가 너무 작을 때 중복 요청이 남발되지 않도록 하한
+        self.hedged_calls = 0
+        self.hedge_max_abandoned = 8  # 결과를 버린 채 아직 실행 중인 요청이 이만큼 쌓이면 중복 요청 생략 (API 한도/스레드 보호)
+        self.abandoned_inflight = 0
+        self.abandoned_calls = 0
+        self.latencies = deque(maxlen=200)  # 최근 생성 시간 (초)
+        self.hedge_lock = threading.Lock()
+        self.hedge_executor = None
+        self.embed_model = embed_model
+        self.embedding_cache = embedding_cache
+        self.embedders = {}  # 임베딩 모델명 -> OllamaEmbedder
+        self.vector_index = vector_index
+        self.text_cache = text_cache
+        self.max_text_pages = max_text_pages
+        self.ollama_client = ollama_client_pool.get(ollama_host)  # 워커 스레드 간 공유
+        self.keep_alive = keep_alive
+
+        self.model_map = {"gemini": self.call_gemini, "llama": self.call_llama, "qwen": self.call_qwen} # 모델명 + 메소드 매핑
         self.na_items = (None, "N/A", "n/a", "", 0) # 추출 실패 시 발생 항목
 
     def __call__(self, doc:str, *args, **kwargs) -> dict:
@@ -356,13 +1857,37 @@ class LLMFeatsExtractor(Node):
         if extractor is None:
             raise ValueError(f"지원하지 않는 LLM 타입: {self.llm_type}")
 
+        pdf_hash = None
+        if self.cache is not None:
+            pdf_hash = file_sha256(file_path)
+            cached = self.cache.get(pdf_hash, self.prompt, self.llm_type, self.llm_version)
+            if self.is_valid_response(cached):
+                print(f"[LLMFeatsExtractor] {doc} 캐시 결과 사용")
+                return cached
+
+        done, ruled = self.extract_rules(doc, file_path, pdf_hash)
+        if done is not None:
+            return done
+
         if self.interval > 0:
             time.sleep(self.interval)
 
         try:
-            response = extractor(file_path, self.llm_version, self.prompt, self.prompt, self.api_key)
+            prompt = self.prompt
+            if ruled:
+                # LLM에는 나머지 항목 위주로 요청, 규칙 값은 LLM이 비워 둔 항목만 채움 (규칙 오매칭이 LLM 정답을 덮어쓰지 않도록)
+                missing = [col for col in self.essential_cols if col not in ruled]
+                prompt += f"\nThe following fields are already known and may be returned as 'N/A' or 0: {', '.join(ruled)}." \
+                          + (f"\nFocus on: {', '.join(missing)}." if missing else "")
+            self.llm_calls += 1
+            response = extractor(file_path, self.llm_version, prompt, self.interval, self.api_key)
+            response = self.merge_ruled(response, ruled)
+            if self.reask and not self.is_valid_response(response):
+                response = self.reask_missing(extractor, file_path, response)
 
             if self.is_valid_response(response):
+                if self.cache is not None:
+                    self.cache.put(pdf_hash, self.prompt, self.llm_type, self.llm_version, response)
                 return response
             else:
                 raise ValueError(f"{os.path.basename(file_path)} 필수 데이터 없음: {response}")
@@ -370,6 +1895,41 @@ class LLMFeatsExtractor(Node):
         except Exception as e:
             print(f"[LLMFeatsExtractor] {self.llm_type}-{self.llm_version} Error: {e}")
 
+    def extract_rules(self, doc:str, file_path:str, pdf_hash:str=None) -> tuple[dict|None, dict]:
+        """
+        규칙 기반 1차 추출 (rule_parser 미지정 시 생략)
+
+        Returns: (필수 항목을 모두 찾은 경우 최종 결과 / 아니면 None, 규칙으로 찾은 항목)
+        """
+        if self.rule_parser is None:
+            return None, {}
+        if self.cache is not None:
+            pdf_hash = pdf_hash if pdf_hash is not None else file_sha256(file_path)
+            cached = self.cache.get(pdf_hash, self.prompt, "rules", self.rule_parser.version)
+            if self.is_valid_response(cached):
+                print(f"[LLMFeatsExtractor] {doc} 규칙 기반 추출 캐시 결과 사용")
+                return cached, cached
+
+        ruled = {}
+        try:
+            ruled = {k: v for k, v in self.rule_parser(file_path).items() if v not in self.na_items}
+        except Exception as e:
+            print(f"[LLMFeatsExtractor] {doc} 규칙 기반 추출 실패: {e}")
+        if self.essential_cols and self.is_valid_response(ruled):
+            self.rule_hits += 1
+            print(f"[LLMFeatsExtractor] {doc} 규칙 기반 추출 완료 (LLM 호출 생략)")
+            ruled = {**{field: 0 if field.endswith("price") else "N/A" for field in self.rule_parser.rules}, **ruled}  # 프롬프트와 같은 결측값 표기
+            if self.cache is not None:  # LLM 호출 결과와 섞이지 않도록 규칙 결과는 별도 키("rules", 규칙 버전)로 저장
+                self.cache.put(pdf_hash, self.prompt, "rules", self.rule_parser.version, ruled)
+            return ruled, ruled
+        return None, ruled
+
+    def merge_ruled(self, response, ruled:dict):
+        """규칙 값은 LLM이 비워 둔 항목만 채움 (규칙 오매칭이 LLM 정답을 덮어쓰지 않도록)"""
+        if ruled and isinstance(response, dict):
+            response.update({k: v for k, v in ruled.items() if response.get(k) in self.na_items})
+        return response
+
     def is_valid_response(self, response:dict) -> bool:
         is_valid = response is not None and isinstance(response, dict)
 
@@ -378,20 +1938,853 @@ class LLMFeatsExtractor(Node):
 
         return is_valid
 
-    def call_gemini(self, file_path:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None) -> dict:
-        client = genai.Client(api_key=api_key)
-        sample_file = client.files.upload(file=file_path)
+    def reask_missing(self, extractor, file_path:str, response:dict|None) -> dict|None:
+        """필수 항목 중 누락된 항목만 재질의하여 기존 응답에 병합"""
+        response = response if isinstance(response, dict) else {}
+        missing = [col for col in self.essential_cols if response.get(col) in self.na_items]
+        if not missing:
+            return response
+
+        schema = self.response_schema
+        if schema is not None:
+            fields = {col: (schema.model_fields[col].annotation, schema.model_fields[col]) for col in missing if col in schema.model_fields}
+            schema = create_model(f"Missing{schema.__name__}", **fields) if fields else None
+        descriptions = [f"- {col} ({self.response_schema.model_fields[col].description})"
+                        if self.response_schema is not None and col in self.response_schema.model_fields else f"- {col}" for col in missing]
+
+        print(f"[LLMFeatsExtractor] {os.path.basename(file_path)} 누락 항목 재질의: {missing}")
+        self.reask_calls += 1
+        retry = extractor(file_path, self.llm_version, reask_prompt.format(fields="\n".join(descriptions)), self.interval, self.api_key,
+                          response_schema=schema, stage="reask")
+        if isinstance(retry, dict):
+            response.update({col: retry[col] for col in missing if retry.get(col) not in self.na_items})
+
+        return response
+
+    def call_gemini(self, file_path:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, response_schema:type[BaseModel]=...,
+                    stage:str="extract") -> dict:
+        pdf_hash = file_sha256(file_path)
+        config = self.gemini_config(self.response_schema if response_schema is ... else response_schema)
+
+        doc = os.path.basename(file_path)
+        with self.telemetry.call("gemini", llm_version, doc, stage) as call:
+            # 중복 요청끼리 계측값이 섞이지 않도록 시도마다 별도 기록을 쓰고, 먼저 성공한 시도의 값만 반영
+            attempt = lambda key: self.generate_gemini(key, file_path, pdf_hash, llm_version, prompt, config,
+                                                       LLMCallRecord(None, "gemini", llm_version, doc, stage))
+            response, timing, latency = self.run_with_deadline(attempt, api_key, call)
+            for name in ("upload_sec", "generate_sec", "retries"):
+                call.values[name] += timing.values[name]
+            call.set_usage(response)
+        self.latencies.append(latency)
+
+        return self.parse_gemini_response(response)
+
+    def generate_gemini(self, api_key:str, file_path:str, pdf_hash:str, llm_version:str, prompt:str, config, call:LLMCallRecord) -> tuple:
+        """
+        생성 요청 1회 (중복 요청 시 시도마다 호출)
 
-        response = client.models.generate_content(model=f"gemini-{llm_version}", contents=[sample_file, prompt])
-        response = response.text.replace("```json", "").replace("```", "").strip()
+        Args:
+            call (LLMCallRecord): 이 시도 전용 계측 기록 (telemetry에 직접 기록하지 않음)
+        Returns: (응답, 계측 기록, 생성 시간(초))
+        """
+        client = self.client_pool.get(api_key)
+        with call.timer("upload_sec"):
+            pdf_part = self.file_cache.get_part(client, api_key, file_path, pdf_hash)
 
-        return json.loads(response)
+        start = time.perf_counter()
+        try:
+            with call.timer("generate_sec"):
+                response = client.models.generate_content(model=f"gemini-{llm_version}", contents=[pdf_part, prompt], config=config)
+        except Exception as e:
+            if isinstance(pdf_part, types.Part):
+                raise
+            # 업로드 핸들이 서버에서 삭제/만료된 경우 한 번만 다시 업로드
+            print(f"[LLMFeatsExtractor] 업로드 파일 재사용 실패, 재업로드: {e}")
+            call.retry()
+            self.file_cache.invalidate(api_key, pdf_hash)
+            with call.timer("upload_sec"):
+                pdf_part = self.file_cache.get_part(client, api_key, file_path, pdf_hash)
+            start = time.perf_counter()
+            with call.timer("generate_sec"):
+                response = client.models.generate_content(model=f"gemini-{llm_version}", contents=[pdf_part, prompt], config=config)
+
+        return response, call, time.perf_counter() - start
+
+    def run_with_deadline(self, attempt, api_key:str, call:LLMCallRecord):
+        """
+        제한 시간/중복 요청(hedge) 적용 호출. 대기 시간 안에 응답이 없으면 다른 키로 중복 요청을 보내고 먼저 성공한 응답 사용.
+        이미 실행 중인 요청은 스레드에서 중단할 수 없으므로 남은 요청은 결과를 버리고, 요청별 HTTP 제한 시간(deadline_sec)으로 종료됨.
+        버린 요청도 끝날 때까지 API 한도와 실행 스레드를 쓰므로 abandoned_inflight로 세고, hedge_max_abandoned 이상이면 중복 요청을 보내지 않음.
+        실행기 스레드는 close() (또는 with 블록 종료) 시 정리.
 
-    def call_llama(self) -> dict:
-        pass
+        Args:
+            attempt (callable): API 키를 받아 응답을 반환하는 호출
+            api_key (str): 첫 요청에 사용할 API 키
+            call (LLMCallRecord): 호출 계측 기록
+        Returns: 먼저 성공한 응답
+        """
+        if not self.hedge and self.deadline_sec is None:
+            return attempt(api_key)
+
+        with self.hedge_lock:
+            if self.hedge_executor is None:
+                self.hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+        start = time.monotonic()
+        futures = [self.hedge_executor.submit(attempt, api_key)]
+        if self.hedge:
+            delay = self.get_hedge_delay()
+            if self.deadline_sec is not None:
+                delay = min(delay, self.deadline_sec)
+            done, _ = wait(futures, timeout=delay)
+            if not done and self.abandoned_inflight >= self.hedge_max_abandoned:
+                print(f"[LLMFeatsExtractor] 버려진 요청 {self.abandoned_inflight}건 실행 중, 중복 요청 생략")
+            elif not done and (self.deadline_sec is None or delay < self.deadline_sec):
+                hedge_key = self.next_hedge_key(api_key)
+                print(f"[LLMFeatsExtractor] {delay:.1f}초 내 응답 없음, 중복 요청 전송")
+                self.hedged_calls += 1
+                call.values["hedged"] = True
+                futures.append(self.hedge_executor.submit(attempt, hedge_key))
+
+        error = None
+        while futures:
+            remaining = None if self.deadline_sec is None else max(0.0, self.deadline_sec - (time.monotonic() - start))
+            done, pending = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                self.abandon(pending)
+                raise TimeoutError(f"LLM 호출 제한 시간 초과 ({self.deadline_sec}초)")
+
+            for future in done:
+                if future.exception() is None:
+                    self.abandon(pending)
+                    return future.result()
+                error = future.exception()
+            futures = list(pending)
+
+        raise error
+
+    def abandon(self, futures):
+        """결과를 쓰지 않을 요청 취소 - 이미 실행 중이면 끝날 때까지 abandoned_inflight로 집계"""
+        for future in futures:
+            if future.cancel():
+                continue
+            with self.hedge_lock:
+                self.abandoned_inflight += 1
+                self.abandoned_calls += 1
+            future.add_done_callback(self.release_abandoned)
+
+    def release_abandoned(self, future):
+        with self.hedge_lock:
+            self.abandoned_inflight -= 1
+
+    def close(self):
+        """중복 요청 실행기 정리 (대기 중인 요청은 취소, 실행 중인 요청은 기다리지 않음)"""
+        with self.hedge_lock:
+            executor, self.hedge_executor = self.hedge_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def get_hedge_delay(self) -> float:
+        """최근 생성 시간의 hedge_quantile 분위수 (표본 부족 시 hedge_delay_sec)"""
+        samples = list(self.latencies)
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_delay_sec
+        return max(float(np.percentile(samples, self.hedge_quantile * 100)), self.hedge_min_delay_sec)
+
+    def next_hedge_key(self, api_key:str) -> str:
+        candidates = [key for key in self.hedge_api_keys if key != api_key]
+        if not candidates:
+            return api_key
+        with self.hedge_lock:
+            return candidates[self.hedged_calls % len(candidates)]
+
+    def gemini_config(self, response_schema:type[BaseModel]=None) -> types.GenerateContentConfig|None:
+        options = {}
+        if response_schema is not None:
+            options.update(response_mime_type="application/json", response_schema=response_schema)
+        if self.deadline_sec is not None:
+            options["http_options"] = types.HttpOptions(timeout=int(self.deadline_sec * 1000))  # ms
+        return types.GenerateContentConfig(**options) if options else None
+
+    def parse_gemini_response(self, response) -> dict:
+        """구조화 응답(parsed) 우선, 없으면 텍스트 JSON 파싱. 형식이 깨진 응답은 빈 dict (누락 항목 재질의 대상)"""
+        parsed = getattr(response, "parsed", None)
+        if isinstance(parsed, BaseModel):
+            return parsed.model_dump()
+        if isinstance(parsed, dict):
+            return parsed
+
+        text = (response.text or "").replace("```json", "").replace("```", "").strip()
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            print(f"[LLMFeatsExtractor] JSON 형식 오류 응답: {text[:200]}")
+            return {}
+
+    def call_llama(self, file_path:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, **kwargs) -> dict:
+        return self.call_ollama(f"llama{llm_version}", file_path, prompt, **kwargs)
+
+    def call_qwen(self, file_path:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, **kwargs) -> dict:
+        return self.call_ollama(f"qwen{llm_version}", file_path, prompt, **kwargs)
+
+    def ollama_model(self) -> str:
+        """Ollama 모델명 (예: qwen + 3:8b -> qwen3:8b)"""
+        return f"{self.llm_type}{self.llm_version}"
+
+    def get_embedder(self, model:str) -> OllamaEmbedder:
+        with self.hedge_lock:
+            if model not in self.embedders:
+                self.embedders[model] = OllamaEmbedder(model, self.embedding_cache, client=self.ollama_client, keep_alive=self.keep_alive)
+            return self.embedders[model]
+
+    def call_ollama(self, model:str, file_path:str, prompt:str, response_schema:type[BaseModel]=..., stage:str="extract") -> dict:
+        """PDF 텍스트 청크 중 항목별 질문과 유사한 청크만 골라 로컬 모델에 전달 (RAG)"""
+        chunks, positions = split_pages(get_pdf_pages(file_path, self.text_cache, self.max_text_pages))
+        embedder = self.get_embedder(self.embed_model or model)
+        context = self.retrieve_context(file_path, embedder, chunks, positions, embedder.embed(chunks))
+
+        return self.generate_ollama(model, os.path.basename(file_path), prompt, context, response_schema, stage)
+
+    def retrieve_context(self, file_path:str, embedder:OllamaEmbedder, chunks:list[str], positions:list[tuple[int, int]], store:np.ndarray) -> list[str]:
+        """모든 항목 질문의 관련 청크를 한 번에 검색 (리포트 간 색인 사용 시 청크 임베딩 추가)"""
+        retriever = ChunkRetriever(store)
+        if self.vector_index is not None:
+            self.vector_index.add(file_path, retriever.matrix, positions, model=embedder.model)
+
+        indices, _ = retriever.search(embedder.embed_questions(list(ollama_prompts.values())), k=2)
+        return list(dict.fromkeys(chunks[i] for i in indices.ravel()))  # 질문 순서 유지, 중복 제거
+
+    def generate_ollama(self, model:str, doc:str, prompt:str, context:list[str], response_schema:type[BaseModel]=..., stage:str="extract") -> dict:
+        """검색한 청크 전체를 한 번의 생성 요청으로 전달하고 모든 항목을 JSON으로 받음"""
+        schema = self.response_schema if response_schema is ... else response_schema
+        with self.telemetry.call(self.llm_type, self.llm_version, doc, stage) as call:
+            with call.timer("generate_sec"):
+                response = self.ollama_client.chat(model=model,
+                                                   messages=[{"role": "system", "content": prompt},
+                                                             {"role": "user", "content": "Give me the context!"},
+                                                             {"role": "assistant", "content": "\n".join(context)},
+                                                             {"role": "user", "content": "Return a JSON object from the reference as per my instructions."}],
+                                                   format=schema.model_json_schema() if schema is not None else "json",
+                                                   keep_alive=self.keep_alive,
+                                                   stream=False)
+            call.values["input_tokens"] = response.get("prompt_eval_count") or 0
+            call.values["output_tokens"] = response.get("eval_count") or 0
+
+        try:
+            return json.loads(response["message"]["content"])
+        except json.JSONDecodeError:
+            print(f"[LLMFeatsExtractor] JSON 형식 오류 응답: {response['message']['content'][:200]}")
+            return {}
+
+class LocalLLMFeatsExtractor(LLMFeatsExtractor):
+    """
+    로컬 모델(Ollama) 배치 추출기. 참고문서 목록을 한 번에 받아
+    텍스트 추출(프로세스 풀) -> 전체 문서 청크 임베딩(배치 요청) -> 문서별 검색 + 단일 생성 요청(스레드 풀) 순으로 처리.
+    Ollama 클라이언트/임베더는 워커 스레드 간 공유하고 keep_alive로 모델을 메모리에 유지.
+    """
+    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, essential_cols:list|tuple=None,
+                 max_workers:int=2, text_workers:int=None, **kwargs):
+        """
+        Args:
+            docs_dir_path (str): 참고문서 디렉토리 경로 (DocumentsLoader 사용 시 경로 일치 필수)
+            llm_type (str): 로컬 LLM 종류 (llama, qwen)
+            llm_version (str): 생성자 LLM 버전 정보 - Ollama 태그 (예: 3.1:8b, 3:8b)
+            prompt (str): LLM에 전달할 프롬프트
+            essential_cols (list|tuple): 추출 항목 중 필수 항목명
+            max_workers (int): 동시 생성 요청 수 (Ollama 서버의 OLLAMA_NUM_PARALLEL에 맞춤)
+            text_workers (int): 텍스트 추출 프로세스 수 (None 시 CPU 코어 수)
+            **kwargs: LLMFeatsExtractor 옵션 (cache, response_schema, reask, embed_model, embedding_cache, vector_index, text_cache, max_text_pages, ollama_host, keep_alive)
+        """
+        super().__init__(docs_dir_path, llm_type, llm_version, prompt, essential_cols=essential_cols, **kwargs)
+        if llm_type not in ("llama", "qwen"):
+            raise ValueError(f"로컬 모델이 아닌 LLM 타입: {llm_type}")
+
+        self.max_workers = max_workers
+        self.text_workers = text_workers
+
+    def __call__(self, docs:list|tuple, *args, **kwargs) -> list:
+        """
+        여러 참고문서에서 로컬 LLM을 통해 필요한 정보를 추출
+
+        Args:
+            docs (list|tuple): 참고문서 파일명 목록
+        Returns: 참고문서별 추출 정보 목록 (입력 순서 유지, 실패 시 None)
+        """
+        results, todo = {}, []
+        for doc in docs:
+            file_path = os.path.join(self.docs_dir_path, doc)
+            if not os.path.exists(file_path):
+                print(f"[LocalLLMFeatsExtractor] 파일 없음: {file_path}")
+                continue
+            if self.cache is not None:
+                cached = self.cache.get(file_sha256(file_path), self.prompt, self.llm_type, self.llm_version)
+                if self.is_valid_response(cached):
+                    results[doc] = cached
+                    continue
+            todo.append(doc)
+        print(f"[LocalLLMFeatsExtractor] {self.ollama_model()}(으)로 {len(todo)}개 문서 추출 중... (캐시 {len(results)}개)")
+
+        # 1) 텍스트 추출 (프로세스 풀)
+        text_extractor = PdfTextExtractor(self.docs_dir_path, self.text_cache, self.max_text_pages, self.text_workers)
+        split = {doc: split_pages(pages) for doc, pages in text_extractor.iter_results(todo) if pages is not None}
+
+        # 2) 모든 문서의 청크를 모아 배치 임베딩
+        embedder = self.get_embedder(self.embed_model or self.ollama_model())
+        all_chunks = [chunk for chunks, _ in split.values() for chunk in chunks]
+        store = embedder.embed(all_chunks) if all_chunks else np.zeros((0, 0), dtype=np.float32)
+        stores, start = {}, 0
+        for doc, (chunks, _) in split.items():
+            stores[doc] = store[start:start + len(chunks)]
+            start += len(chunks)
+
+        # 3) 문서별 검색 + 단일 생성 요청 (스레드 풀, 클라이언트 공유)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.extract_local, doc, embedder, *split[doc], stores[doc]): doc for doc in split}
+            for future in as_completed(futures):
+                doc = futures[future]
+                try:
+                    results[doc] = future.result()
+                except Exception as e:
+                    print(f"[LocalLLMFeatsExtractor] {self.llm_type}-{self.llm_version} Error: {e}")
+
+        print(f"[LocalLLMFeatsExtractor] 모든 작업 완료 - 성공 {sum(r is not None for r in results.values())}/{len(docs)}")
+        return [results.get(doc) for doc in docs]
+
+    def extract_local(self, doc:str, embedder:OllamaEmbedder, chunks:list[str], positions:list[tuple[int, int]], store:np.ndarray) -> dict:
+        if not chunks:
+            raise ValueError(f"{doc} 텍스트 없음 (스캔 이미지 PDF)")
+
+        file_path = os.path.join(self.docs_dir_path, doc)
+        context = self.retrieve_context(file_path, embedder, chunks, positions, store)
+        response = self.generate_ollama(self.ollama_model(), doc, self.prompt, context)
+
+        if self.reask and not self.is_valid_response(response):
+            response = self.reask_missing(self.model_map[self.llm_type], file_path, response)
+        if not self.is_valid_response(response):
+            raise ValueError(f"{doc} 필수 데이터 없음: {response}")
+        if self.cache is not None:
+            self.cache.put(file_sha256(file_path), self.prompt, self.llm_type, self.llm_version, response)
+
+        return response
+
+
+class AsyncLLMFeatsExtractor(LLMFeatsExtractor):
+    """
+    asyncio 기반 다중 API 키 추출기. 참고문서 목록을 한 번에 받아 처리.
+    키별 RPM/TPM 한도 내에서 여유가 가장 많은 키로 요청을 배정하고, 429 응답은 실패 대신 재대기열 처리.
+    """
+    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, api_keys:list|tuple=None, rpm:int=10, tpm:int=250000,
+                 est_tokens:int=8000, max_concurrency:int=None, max_requeues:int=10, essential_cols:list|tuple=None,
+                 cache:ExtractionCache=None, client_pool:GeminiClientPool=None, file_cache:GeminiFileCache=None, response_schema:type[BaseModel]=None,
+                 telemetry:LLMTelemetry=None):
+        """
+        Args:
+            docs_dir_path (str): 참고문서 디렉토리 경로 (DocumentsLoader 사용 시 경로 일치 필수)
+            llm_version (str): 생성자 LLM 버전 정보 - 포맷은 모델에 따라 다름 (공식문서 참조)
+            prompt (str): LLM에 전달할 프롬프트
+            api_keys (list|tuple): 사용할 API 키 목록 (None 시 환경 변수 GEMINI_API_KEY_*, GOOGLE_API_KEY)
+            rpm (int): 키당 분당 요청 수 한도
+            tpm (int): 키당 분당 토큰 수 한도
+            est_tokens (int): 요청당 예상 토큰 수 초기값 (이후 실제 사용량 평균으로 갱신)
+            max_concurrency (int): 동시 요청 수 (None 시 키 수 x 4)
+            max_requeues (int): 429 응답 시 재대기열 최대 횟수
+            essential_cols (list|tuple): 추출 항목 중 필수 항목명
+            cache (ExtractionCache): 추출 결과 캐시 (None 시 미사용)
+            client_pool (GeminiClientPool): Gemini 클라이언트 풀 (None 시 모듈 공용 풀)
+            file_cache (GeminiFileCache): PDF 업로드 핸들 캐시 (None 시 모듈 공용 캐시)
+            response_schema (type[BaseModel]): 구조화 출력 스키마 (None 시 텍스트 응답 파싱)
+            telemetry (LLMTelemetry): LLM 호출 계측기 (None 시 모듈 공용 계측기)
+        """
+        super().__init__(docs_dir_path, llm_type, llm_version, prompt, essential_cols=essential_cols,
+                         cache=cache, client_pool=client_pool, file_cache=file_cache, response_schema=response_schema, telemetry=telemetry)
+        self.api_keys = list(api_keys) if api_keys is not None else load_api_keys()
+        self.scheduler = ApiKeyScheduler(self.api_keys, rpm=rpm, tpm=tpm)
+        self.est_tokens = est_tokens
+        self.max_concurrency = max_concurrency if max_concurrency is not None else len(self.api_keys) * 4
+        self.max_requeues = max_requeues
+
+        self.async_model_map = {"gemini": self.call_gemini_async,}
+
+    def __call__(self, docs:list|tuple, *args, **kwargs) -> list:
+        """
+        여러 참고문서에서 LLM을 통해 필요한 정보를 추출
+
+        Args:
+            docs (list|tuple): 참고문서 파일명 목록
+        Returns: 참고문서별 추출 정보 목록 (입력 순서 유지, 실패 시 None)
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.extract_all(docs))
+
+        # 이미 이벤트 루프가 실행 중인 환경(노트북)에서는 별도 스레드에서 실행
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.extract_all(docs)).result()
+
+    async def extract_all(self, docs:list|tuple) -> list:
+        extractor = self.async_model_map.get(self.llm_type, None)
+        if extractor is None:
+            raise ValueError(f"지원하지 않는 LLM 타입: {self.llm_type}")
+
+        print(f"[AsyncLLMFeatsExtractor] {self.llm_type}(으)로 {len(docs)}개 문서 추출 중... (API 키 {len(self.api_keys)}개)")
+        results = [None] * len(docs)
+        pending = asyncio.Queue()
+        for i, doc in enumerate(docs):
+            pending.put_nowait((i, doc, 0))
+
+        workers = [asyncio.create_task(self.worker(extractor, pending, results)) for _ in range(self.max_concurrency)]
+        await pending.join()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        print(f"[AsyncLLMFeatsExtractor] 모든 작업 완료 - 키별 요청: {self.scheduler.stats()}")
+        return results
+
+    async def worker(self, extractor, pending:asyncio.Queue, results:list):
+        while True:
+            i, doc, requeues = await pending.get()
+            try:
+                results[i] = await self.extract_one(extractor, doc)
+            except errors.APIError as e:
+                if e.code == 429 and requeues < self.max_requeues:
+                    print(f"[AsyncLLMFeatsExtractor] {doc} 요청 한도 초과(429), 재대기열 ({requeues + 1}/{self.max_requeues})")
+                    pending.put_nowait((i, doc, requeues + 1))
+                else:
+                    print(f"[AsyncLLMFeatsExtractor] {self.llm_type}-{self.llm_version} Error: {e}")
+            except Exception as e:
+                print(f"[AsyncLLMFeatsExtractor] {self.llm_type}-{self.llm_version} Error: {e}")
+            finally:
+                pending.task_done()
+
+    async def extract_one(self, extractor, doc:str) -> dict:
+        file_path = os.path.join(self.docs_dir_path, doc)
+        pdf_hash = await asyncio.to_thread(file_sha256, file_path)
+
+        if self.cache is not None:
+            cached = self.cache.get(pdf_hash, self.prompt, self.llm_type, self.llm_version)
+            if self.is_valid_response(cached):
+                print(f"[AsyncLLMFeatsExtractor] {doc} 캐시 결과 사용")
+                return cached
+
+        budget, entry = await self.scheduler.acquire(self.est_tokens)
+        try:
+            response, used_tokens = await extractor(file_path, pdf_hash, budget.api_key)
+        except errors.APIError as e:
+            if e.code == 429:
+                self.scheduler.penalize(budget, self.parse_retry_delay(e))
+            raise
+
+        if used_tokens:
+            self.scheduler.settle(entry, used_tokens)
+            self.est_tokens = int(self.est_tokens * 0.8 + used_tokens * 0.2)  # 실제 사용량 이동평균
+
+        if not self.is_valid_response(response):
+            raise ValueError(f"{doc} 필수 데이터 없음: {response}")
+        if self.cache is not None:
+            self.cache.put(pdf_hash, self.prompt, self.llm_type, self.llm_version, response)
+
+        return response
+
+    async def call_gemini_async(self, file_path:str, pdf_hash:str, api_key:str) -> tuple[dict, int]:
+        client = self.client_pool.get(api_key)
+
+        with self.telemetry.call("gemini", self.llm_version, os.path.basename(file_path)) as call:
+            with call.timer("upload_sec"):
+                pdf_part = await asyncio.to_thread(self.file_cache.get_part, client, api_key, file_path, pdf_hash)
+
+            try:
+                with call.timer("generate_sec"):
+                    response = await client.aio.models.generate_content(model=f"gemini-{self.llm_version}", contents=[pdf_part, self.prompt],
+                                                                        config=self.gemini_config(self.response_schema))
+            except errors.APIError as e:
+                if e.code == 429 or isinstance(pdf_part, types.Part):
+                    raise
+                # 업로드 핸들이 서버에서 삭제/만료된 경우 한 번만 다시 업로드
+                print(f"[AsyncLLMFeatsExtractor] 업로드 파일 재사용 실패, 재업로드: {e}")
+                call.retry()
+                self.file_cache.invalidate(api_key, pdf_hash)
+                with call.timer("upload_sec"):
+                    pdf_part = await asyncio.to_thread(self.file_cache.get_part, client, api_key, file_path, pdf_hash)
+                with call.timer("generate_sec"):
+                    response = await client.aio.models.generate_content(model=f"gemini-{self.llm_version}", contents=[pdf_part, self.prompt],
+                                                                        config=self.gemini_config(self.response_schema))
+            call.set_usage(response)
+
+        usage = getattr(response, "usage_metadata", None)
+        used_tokens = getattr(usage, "total_token_count", None) or 0
+
+        return self.parse_gemini_response(response), used_tokens
+
+    @staticmethod
+    def parse_retry_delay(error:errors.APIError) -> float|None:
+        """429 응답의 RetryInfo(retryDelay: "30s")에서 재시도 지연 시간 추출"""
+        match = re.search(r"retryDelay['\"]?\s*:\s*['\"](\d+(?:\.\d+)?)s", str(getattr(error, "details", "")) + str(error))
+        return float(match.group(1)) if match else None
+
+
+class BatchLLMFeatsExtractor(LLMFeatsExtractor):
+    """
+    대량 백필용 배치 추출기. 참고문서 목록을 batch_size 단위 배치 작업으로 제출하고 완료까지 폴링.
+    진행 상태(업로드 URI, 작업 이름)를 state_path에 기록하므로 중단 후 같은 목록으로 다시 호출하면 이어서 진행.
+    실패/만료/취소된 작업은 성공한 작업의 결과만 반환하고 상태 파일에 남겨 다음 호출 때 재제출.
+    일일 증분은 기존 LLMFeatsExtractor(파일 단위 호출)를 사용.
+    """
+    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, api_key:str=None, backend=None,
+                 state_path:str="llm_batch_state.json", batch_size:int=500, poll_interval:int|float=30, essential_cols:list|tuple=None,
+                 cache:ExtractionCache=None, telemetry:LLMTelemetry=None):
+        """
+        Args:
+            docs_dir_path (str): 참고문서 디렉토리 경로 (DocumentsLoader 사용 시 경로 일치 필수)
+            llm_version (str): 생성자 LLM 버전 정보 - 포맷은 모델에 따라 다름 (공식문서 참조)
+            prompt (str): LLM에 전달할 프롬프트
+            api_key (str): LLM API 키
+            backend (GeminiBatchBackend|LocalBatchBackend): 배치 작업 백엔드 (None 시 GeminiBatchBackend)
+            state_path (str): 진행 상태 파일 경로
+            batch_size (int): 배치 작업 하나에 담을 최대 요청 수
+            poll_interval (int|float): 작업 상태 조회 간격 (초)
+            essential_cols (list|tuple): 추출 항목 중 필수 항목명
+            cache (ExtractionCache): 추출 결과 캐시 (None 시 미사용)
+            telemetry (LLMTelemetry): LLM 호출 계측기 - 결과별 토큰/비용 기록 (None 시 모듈 공용 계측기)
+        """
+        super().__init__(docs_dir_path, llm_type, llm_version, prompt, api_key=api_key, essential_cols=essential_cols, cache=cache, telemetry=telemetry)
+        if llm_type != "gemini":
+            raise ValueError(f"배치 모드를 지원하지 않는 LLM 타입: {llm_type}")
+
+        self.backend = backend if backend is not None else GeminiBatchBackend(api_key)
+        self.state_path = state_path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def __call__(self, docs:list|tuple, *args, **kwargs) -> list:
+        """
+        여러 참고문서를 배치 작업으로 추출
+
+        Args:
+            docs (list|tuple): 참고문서 파일명 목록
+        Returns: 참고문서별 추출 정보 목록 (입력 순서 유지, 실패 시 None)
+        """
+        results = {}
+        todo = []
+        for doc in docs:
+            cached = self.get_cached(doc)
+            if cached is not None:
+                results[doc] = cached
+            else:
+                todo.append(doc)
+        print(f"[BatchLLMFeatsExtractor] 전체 {len(docs)}개 중 캐시 {len(results)}개, 배치 추출 {len(todo)}개")
+
+        state = self.load_state(docs, todo)
+        for job in state["jobs"]:
+            if job.get("done"):
+                continue
+            self.upload_job_pdfs(state, job)
+            if job.get("name") is None:
+                job["name"] = self.submit_job(state, job)
+                self.save_state(state)
+                print(f"[BatchLLMFeatsExtractor] 배치 작업 제출: {job['name']} ({len(job['docs'])}건)")
+
+        failed = 0
+        for job in state["jobs"]:
+            if not job.get("done"):
+                job_state = self.wait_job(job)
+                if job_state != "JOB_STATE_SUCCEEDED":
+                    # 실패/만료/취소된 작업은 이름을 지워 다음 호출 때 다시 제출, 나머지 작업 결과는 계속 수집
+                    print(f"[BatchLLMFeatsExtractor] 배치 작업 실패: {job['name']} ({job_state}) - 다음 실행 시 재제출")
+                    job["name"] = None
+                    self.save_state(state)
+                    failed += 1
+                    continue
+                job["done"] = True
+                self.save_state(state)
+            results.update(self.collect_results(job))
+
+        if failed == 0:
+            os.remove(self.state_path)
+        print(f"[BatchLLMFeatsExtractor] 모든 작업 완료 - 성공 {sum(r is not None for r in results.values())}/{len(docs)}, 실패 작업 {failed}개")
+        return [results.get(doc) for doc in docs]
+
+    def get_cached(self, doc:str) -> dict|None:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(file_sha256(os.path.join(self.docs_dir_path, doc)), self.prompt, self.llm_type, self.llm_version)
+        return cached if self.is_valid_response(cached) else None
+
+    def load_state(self, docs:list|tuple, todo:list) -> dict:
+        """같은 문서 목록/프롬프트/모델의 이전 진행 상태가 있으면 이어서 사용, 없으면 todo로 작업 구성"""
+        signature = hashlib.sha256(json.dumps([sorted(docs), self.prompt, self.llm_version], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+        if os.path.exists(self.state_path):
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("signature") == signature:
+                print(f"[BatchLLMFeatsExtractor] 이전 진행 상태에서 재개: {self.state_path}")
+                return state
+            print(f"[BatchLLMFeatsExtractor] 다른 작업의 진행 상태 파일 무시: {self.state_path}")
+
+        jobs = [{"docs": todo[i:i + self.batch_size], "name": None} for i in range(0, len(todo), self.batch_size)]
+        state = {"signature": signature, "uploads": {}, "jobs": jobs}
+        self.save_state(state)
+        return state
+
+    def save_state(self, state:dict):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def upload_job_pdfs(self, state:dict, job:dict):
+        """작업에 포함된 PDF 업로드 (업로드마다 상태 저장 - 재개 시 중복 업로드 방지)"""
+        for doc in job["docs"]:
+            if doc not in state["uploads"]:
+                state["uploads"][doc] = self.backend.upload_pdf(os.path.join(self.docs_dir_path, doc))
+                self.save_state(state)
+
+    def submit_job(self, state:dict, job:dict) -> str:
+        fd, requests_path = tempfile.mkstemp(suffix=".jsonl")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for doc in job["docs"]:
+                    request = {"contents": [{"role": "user", "parts": [
+                        {"file_data": {"file_uri": state["uploads"][doc], "mime_type": "application/pdf"}},
+                        {"text": self.prompt},
+                    ]}]}
+                    f.write(json.dumps({"key": doc, "request": request}, ensure_ascii=False) + "\n")
+            return self.backend.submit(f"gemini-{self.llm_version}", requests_path, display_name=f"report-extract-{state['signature'][:8]}")
+        finally:
+            os.remove(requests_path)
+
+    def wait_job(self, job:dict) -> str:
+        """작업이 끝날 때까지 폴링하고 최종 상태 반환"""
+        while True:
+            job_state = self.backend.get_state(job["name"])
+            if job_state in BATCH_DONE_STATES:
+                return job_state
+            print(f"[BatchLLMFeatsExtractor] {job['name']} {job_state}... {self.poll_interval}초 후 재확인")
+            time.sleep(self.poll_interval)
+
+    def collect_results(self, job:dict) -> dict:
+        """결과 JSONL을 key(파일명) 기준으로 매핑, 유효한 결과는 캐시에 저장"""
+        results = {}
+        for line in self.backend.fetch_results(job["name"]):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            doc = item.get("key")
+            try:
+                with self.telemetry.call(self.llm_type, self.llm_version, doc, stage="batch") as call:  # 배치는 시간 대신 토큰/비용만 기록
+                    if "error" in item:
+                        raise ValueError(item["error"])
+                    call.set_usage(item["response"])
+                text = "".join(p.get("text", "") for p in item["response"]["candidates"][0]["content"]["parts"])
+                response = json.loads(text.replace("```json", "").replace("```", "").strip())
+                if not self.is_valid_response(response):
+                    raise ValueError(f"필수 데이터 없음: {response}")
+            except Exception as e:
+                print(f"[BatchLLMFeatsExtractor] {doc} 결과 처리 실패: {e}")
+                continue
+
+            results[doc] = response
+            if self.cache is not None:
+                pdf_hash = file_sha256(os.path.join(self.docs_dir_path, doc))
+                self.cache.put(pdf_hash, self.prompt, self.llm_type, self.llm_version, response)
+
+        return results
+
+
+class PackedLLMFeatsExtractor(LLMFeatsExtractor):
+    """
+    짧은 리포트 여러 개(K개)를 한 번의 generate_content 요청에 묶어 추출 (종목분석 대량 백필용).
+    K는 페이지 수 기반 토큰 예산으로 정하고, 응답이 불완전하면 해당 문서만 단일 요청(LLMFeatsExtractor)으로 재처리.
+    rule_parser는 묶기 전에 적용(필수 항목을 모두 찾은 문서는 묶음에서 제외)하고, 묶음 응답의 빈 항목을 규칙 값으로 채운 뒤 누락 항목만 재질의.
+    """
+    def __init__(self, docs_dir_path:str, llm_type:str, llm_version:str, prompt:str, interval:int|float=0, api_key:str=None, essential_cols:list|tuple=None,
+                 max_pack_size:int=8, token_budget:int=30000, tokens_per_page:int=258, max_pages_per_doc:int=6,
+                 max_inline_bytes:int=14 * 1024 * 1024, max_workers:int=4, **kwargs):
+        """
+        Args:
+            docs_dir_path (str): 참고문서 디렉토리 경로 (DocumentsLoader 사용 시 경로 일치 필수)
+            llm_version (str): 생성자 LLM 버전 정보 - 포맷은 모델에 따라 다름 (공식문서 참조)
+            prompt (str): LLM에 전달할 프롬프트
+            interval (int|float): LLM API 호출 간격 (초)
+            api_key (str): LLM API 키
+            essential_cols (list|tuple): 추출 항목 중 필수 항목명
+            max_pack_size (int): 요청 하나에 묶을 최대 문서 수 (불완전 응답 시 절반(최소 2)으로 줄이고 성공 시 1씩 회복)
+            token_budget (int): 요청 하나의 PDF 입력 토큰 예산
+            tokens_per_page (int): PDF 페이지당 입력 토큰 수 (Gemini 기준 258)
+            max_pages_per_doc (int): 이보다 페이지가 많은 문서는 묶지 않고 단일 요청
+            max_inline_bytes (int): 요청 하나에 inline으로 넣을 PDF 총 용량 - 초과분은 업로드 (base64 인코딩 후 요청 크기 한도 20MB 이내)
+            max_workers (int): 단일 요청으로 재처리할 문서의 동시 처리 스레드 수
+            **kwargs: LLMFeatsExtractor 옵션 (cache, client_pool, file_cache, rule_parser, response_schema, reask)
+        """
+        super().__init__(docs_dir_path, llm_type, llm_version, prompt, interval, api_key, essential_cols, **kwargs)
+        if llm_type != "gemini":
+            raise ValueError(f"문서 묶음 요청을 지원하지 않는 LLM 타입: {llm_type}")
+
+        self.max_pack_size = max_pack_size
+        self.pack_size = max_pack_size
+        self.token_budget = token_budget
+        self.tokens_per_page = tokens_per_page
+        self.max_pages_per_doc = max_pages_per_doc
+        self.max_inline_bytes = max_inline_bytes
+        self.max_workers = max_workers
+        self.ruled = {}  # 파일명 -> 규칙으로 찾은 항목 (묶음 응답 보완용)
+        self.packed_calls = 0
+        self.fallback_docs = 0
+
+    def __call__(self, docs:list|tuple, *args, **kwargs) -> list:
+        """
+        여러 참고문서에서 LLM을 통해 필요한 정보를 추출
+
+        Args:
+            docs (list|tuple): 참고문서 파일명 목록
+        Returns: 참고문서별 추출 정보 목록 (입력 순서 유지, 실패 시 None)
+        """
+        results = {}
+        singles, packable = [], []
+        self.ruled = {}
+        for doc in docs:
+            file_path = os.path.join(self.docs_dir_path, doc)
+            pdf_hash = file_sha256(file_path) if self.cache is not None else None
+            if self.cache is not None:
+                cached = self.cache.get(pdf_hash, self.prompt, self.llm_type, self.llm_version)
+                if self.is_valid_response(cached):
+                    results[doc] = cached
+                    continue
+            done, self.ruled[doc] = self.extract_rules(doc, file_path, pdf_hash)
+            if done is not None:
+                results[doc] = done
+                continue
+            try:
+                num_pages = len(PdfReader(file_path).pages)
+            except Exception as e:
+                # 손상/암호화 PDF는 묶음에서 빼고 단일 요청 경로에서 처리
+                print(f"[PackedLLMFeatsExtractor] {doc} 페이지 수 확인 실패, 단일 요청으로 처리: {e}")
+                singles.append(doc)
+                continue
+            if num_pages > self.max_pages_per_doc:
+                singles.append(doc)
+            else:
+                packable.append((doc, num_pages))
+
+        while packable:
+            pack = self.next_pack(packable)
+            packable = packable[len(pack):]
+            if len(pack) == 1:
+                singles.append(pack[0])
+                continue
+
+            packed = self.extract_pack(pack)
+            results.update(packed)
+            missing = [doc for doc in pack if doc not in packed]
+            if missing:
+                self.pack_size = max(2, self.pack_size // 2)
+                print(f"[PackedLLMFeatsExtractor] 불완전 응답 {len(missing)}/{len(pack)}건, 묶음 크기 {self.pack_size}로 축소 후 단일 요청으로 재처리")
+                singles.extend(missing)
+            else:
+                self.pack_size = min(self.max_pack_size, self.pack_size + 1)
+
+        # 단일 요청 재처리는 스레드 풀로 동시 실행 (LLMFeatsExtractor를 MultiThreadNode로 돌릴 때와 같은 방식)
+        self.fallback_docs += len(singles)
+        extract_single = super().__call__
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(extract_single, doc): doc for doc in singles}
+            for future in as_completed(futures):
+                doc = futures[future]
+                try:
+                    results[doc] = future.result()
+                except Exception as e:
+                    print(f"[PackedLLMFeatsExtractor] '{doc}' 처리 중 오류 발생: {e}")
+
+        print(f"[PackedLLMFeatsExtractor] 모든 작업 완료 - 묶음 요청 {self.packed_calls}회, 단일 요청 {len(singles)}건")
+        return [results.get(doc) for doc in docs]
+
+    def next_pack(self, packable:list) -> list[str]:
+        """앞에서부터 묶음 크기와 토큰 예산 안에 드는 만큼 문서 선택 (최소 1개)"""
+        pack, tokens = [], 0
+        for doc, num_pages in packable:
+            doc_tokens = num_pages * self.tokens_per_page
+            if pack and (len(pack) >= self.pack_size or tokens + doc_tokens > self.token_budget):
+                break
+            pack.append(doc)
+            tokens += doc_tokens
+        return pack
+
+    def extract_pack(self, pack:list[str]) -> dict:
+        """묶음 요청 1회 - 유효한 결과만 {파일명: 추출 정보}로 반환"""
+        doc_ids = {f"D{i + 1}": doc for i, doc in enumerate(pack)}
+        if self.interval > 0:
+            time.sleep(self.interval)
+
+        try:
+            self.packed_calls += 1
+            responses = self.call_gemini_packed([os.path.join(self.docs_dir_path, doc) for doc in pack], list(doc_ids), self.api_key)
+        except Exception as e:
+            print(f"[PackedLLMFeatsExtractor] {self.llm_type}-{self.llm_version} Error: {e}")
+            return {}
+
+        results = {}
+        for response in responses if isinstance(responses, list) else []:
+            if not isinstance(response, dict):
+                continue
+            doc = doc_ids.get(str(response.pop("doc_id", "")))
+            if doc is None:
+                continue
+            response = self.merge_ruled(response, self.ruled.get(doc))
+            if self.reask and not self.is_valid_response(response):
+                response = self.reask_missing(self.model_map[self.llm_type], os.path.join(self.docs_dir_path, doc), response)
+            if not self.is_valid_response(response):
+                continue
+            results[doc] = response
+            if self.cache is not None:
+                self.cache.put(file_sha256(os.path.join(self.docs_dir_path, doc)), self.prompt, self.llm_type, self.llm_version, response)
+
+        return results
+
+    def call_gemini_packed(self, file_paths:list[str], doc_ids:list[str], api_key:str=None) -> list:
+        client = self.client_pool.get(api_key)
+        config = None
+        if self.response_schema is not None:
+            item_schema = create_model(f"Packed{self.response_schema.__name__}", __base__=self.response_schema, doc_id=(str, Field(description="document id")))
+            config = types.GenerateContentConfig(response_mime_type="application/json", response_schema=list[item_schema])
+
+        docs = ",".join(os.path.basename(file_path) for file_path in file_paths)
+        with self.telemetry.call("gemini", self.llm_version, docs, stage="packed") as call:
+            contents = []
+            inline_bytes = 0
+            with call.timer("upload_sec"):
+                for doc_id, file_path in zip(doc_ids, file_paths):
+                    size = os.path.getsize(file_path)
+                    force_upload = inline_bytes + size > self.max_inline_bytes  # 묶음 전체 inline 용량 초과 시 업로드
+                    if not force_upload and size <= self.file_cache.inline_max_bytes:
+                        inline_bytes += size
+                    contents.append(f"Document id: {doc_id}")
+                    contents.append(self.file_cache.get_part(client, api_key, file_path, force_upload=force_upload))
+            contents.append(self.prompt + packed_prompt_suffix.format(num_docs=len(file_paths)))
+
+            with call.timer("generate_sec"):
+                response = client.models.generate_content(model=f"gemini-{self.llm_version}", contents=contents, config=config)
+            call.set_usage(response)
+
+        parsed = getattr(response, "parsed", None)
+        if isinstance(parsed, list):
+            return [item.model_dump() if isinstance(item, BaseModel) else item for item in parsed]
+
+        text = (response.text or "").replace("```json", "").replace("```", "").strip()
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            print(f"[PackedLLMFeatsExtractor] JSON 형식 오류 응답: {text[:200]}")
+            return []
 
-    def call_qwen(self) -> dict:
-        pass
 
 class DataProcessor(Node):
     def __call__(self, data, *args, **kwargs):
@@ -655,23 +3048,23 @@ class ReportExtractionsDB(DBNode):
                     self.conn.commit()  # reports에 report_extractions 적재 사실 업데이트 실패 시 적재 내용도 롤백
         finally:
             self.conn.close()
-  
-  class KrxDB(DBNode):
-      def __call__(self, values:tuple): # (report_id, llm_id, hit_date, hit_days)
-          try:
-              self.cursor.execute("""
-                  INSERT INTO krx (id, llm_id, target_price_reached_date, days_to_reach)
-                  VALUES (%s, %s, %s, %s);
-              """, values)
-          except (Exception, psycopg2.Error) as e:
-              print(f"[ReportExtractionsDB] INSERT Error: TABLE (krx)\n{e}")
-              self.conn.rollback()
-              raise
-          else:
-              self.conn.commit()
-          finally:
-              self.conn.close()
-              
+
+class KrxDB(DBNode):
+    def __call__(self, values:tuple): # (report_id, llm_id, hit_date, hit_days)
+        try:
+            self.cursor.execute("""
+                INSERT INTO krx (id, llm_id, target_price_reached_date, days_to_reach)
+                VALUES (%s, %s, %s, %s);
+            """, values)
+        except (Exception, psycopg2.Error) as e:
+            print(f"[ReportExtractionsDB] INSERT Error: TABLE (krx)\n{e}")
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            self.conn.close()
+
 # ------------------------------
 # 사용 예시
 # ------------------------------
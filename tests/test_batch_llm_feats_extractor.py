@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from stock_report_insight_modules import BatchLLMFeatsExtractor, LLMTelemetry, LocalBatchBackend
+
+
+class FailingBatchBackend(LocalBatchBackend):
+    """fail_key 문서가 담긴 작업을 JOB_STATE_FAILED로 끝내는 로컬 배치 백엔드 (fail_key=None 시 정상 처리)"""
+    def __init__(self, root:str, fail_key:str=None, **kwargs):
+        super().__init__(root, **kwargs)
+        self.fail_key = fail_key
+
+    def run_job(self, job_name:str):
+        with open(os.path.join(self.job_dir(job_name), "requests.jsonl"), encoding="utf-8") as f:
+            keys = [json.loads(line)["key"] for line in f if line.strip()]
+        if self.fail_key in keys:
+            self.set_state(job_name, "JOB_STATE_FAILED")
+            return
+        super().run_job(job_name)
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    docs_dir = tmp_path / "docs"
+    docs_dir.mkdir()
+    for doc in ("a.pdf", "b.pdf"):
+        (docs_dir / doc).write_bytes(b"%PDF-1.4 " + doc.encode())
+    return docs_dir
+
+
+def make_extractor(tmp_path, docs_dir, backend):
+    return BatchLLMFeatsExtractor(str(docs_dir), "gemini", "2.5-flash", "prompt", api_key="test", backend=backend,
+                                  state_path=str(tmp_path / "state.json"), batch_size=1, poll_interval=0.01,
+                                  essential_cols=("종목명",), telemetry=LLMTelemetry(None))
+
+
+def test_failed_job_returns_partial_results_and_resubmits(tmp_path, docs_dir):
+    responder = lambda file_path, prompt: json.dumps({"종목명": os.path.basename(file_path)})
+    backend = FailingBatchBackend(str(tmp_path / "jobs"), fail_key="b.pdf", responder=responder)
+    extractor = make_extractor(tmp_path, docs_dir, backend)
+
+    results = extractor(["a.pdf", "b.pdf"])
+    assert results == [{"종목명": "a.pdf"}, None]
+
+    with open(tmp_path / "state.json", encoding="utf-8") as f:
+        state = json.load(f)
+    assert state["jobs"][0]["done"] is True
+    assert not state["jobs"][1].get("done") and state["jobs"][1]["name"] is None
+
+    # 실패한 작업만 새 이름으로 재제출되고, 성공하면 상태 파일 정리
+    backend.fail_key = None
+    results = extractor(["a.pdf", "b.pdf"])
+    assert results == [{"종목명": "a.pdf"}, {"종목명": "b.pdf"}]
+    assert not os.path.exists(tmp_path / "state.json")
@@ -0,0 +1,41 @@
+import json
+import time
+
+from google.genai import types
+
+from stock_report_insight_modules import LLMFeatsExtractor, LLMTelemetry
+
+
+class FakeModels:
+    def __init__(self, api_key:str, slow_sec:float):
+        self.api_key = api_key
+        self.slow_sec = slow_sec
+
+    def generate_content(self, model, contents, config=None):
+        if self.api_key == "slow":
+            time.sleep(self.slow_sec)
+        return types.GenerateContentResponse.model_validate({"candidates": [{"content": {"parts": [{"text": json.dumps({"ticker": self.api_key})}]}}]})
+
+
+class FakeClientPool:
+    def __init__(self, slow_sec:float):
+        self.slow_sec = slow_sec
+
+    def get(self, api_key:str):
+        return type("Client", (), {"models": FakeModels(api_key, self.slow_sec)})()
+
+
+def test_hedged_call_records_only_winning_attempt(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+    metrics_path = tmp_path / "metrics.jsonl"
+    with LLMFeatsExtractor(str(tmp_path), "gemini", "2.5-flash", "prompt", api_key="slow", essential_cols=("ticker",),
+                           client_pool=FakeClientPool(slow_sec=1.0), telemetry=LLMTelemetry(str(metrics_path)),
+                           hedge=True, hedge_delay_sec=0.2, hedge_api_keys=["slow", "fast"]) as extractor:
+        assert extractor("a.pdf") == {"ticker": "fast"}
+        time.sleep(1.2)  # 버려진 요청이 끝난 뒤에도 기록이 바뀌지 않아야 함
+
+        records = [json.loads(line) for line in metrics_path.read_text(encoding="utf-8").splitlines()]
+        assert len(records) == 1 and records[0]["hedged"]
+        assert records[0]["generate_sec"] < 0.5
+        assert len(extractor.latencies) == 1 and extractor.latencies[0] < 0.5
+        assert extractor.abandoned_inflight == 0 and extractor.abandoned_calls == 1
@@ -0,0 +1,210 @@
+import importlib
+import json
+
+import pytest
+
+
+CATEGORY = "종목분석 리포트"
+
+
+@pytest.fixture
+def main_crawl(tmp_path, monkeypatch):
+    # 크롤러는 작업 디렉토리 기준 상대 경로(체크포인트, pdfs, crawler.log)를 사용
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("main_crawl")
+
+
+def make_row(title:str, date:str="25.03.14", pdf:str=None) -> dict:
+    return {"종목명": "삼성전자", "제목": title, "증권사": "NH투자증권", "PDF": pdf or f"https://stock.pstatic.net/{title}.pdf", "작성일": date, "조회수": "10"}
+
+
+def test_committed_pages_are_streamed_to_jsonl_shards(main_crawl, tmp_path):
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1, output_formats=("jsonl",))
+    crawler.commit_page(CATEGORY, [make_row("a", "25.03.14"), make_row("b", "25.02.28")], 2)
+    crawler.commit_page(CATEGORY, [make_row("c", "25.03.15")], 3)
+
+    # save_data() 전에 중단되어도 수집한 페이지는 샤드에 남아 있음
+    rows = list(main_crawl.iter_report_shards(str(tmp_path / "reports"), CATEGORY, columns=["제목", "작성일"]))
+    assert sorted(rows, key=lambda r: r["제목"]) == [{"제목": "a", "작성일": "2025-03-14"}, {"제목": "b", "작성일": "2025-02-28"},
+                                                     {"제목": "c", "작성일": "2025-03-15"}]
+
+    # 종료 시 다시 쓰기는 중복 없이 같은 레코드를 유지
+    crawler.save_jsonl_shards()
+    assert len(list(main_crawl.iter_report_shards(str(tmp_path / "reports"), CATEGORY))) == 3
+
+
+def test_checkpoint_log_replay_survives_crash_mid_write(main_crawl, tmp_path):
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    crawler.commit_page(CATEGORY, [make_row("a"), make_row("b")], 2)
+    crawler.commit_page(CATEGORY, [make_row("c")], 3, high_water="25.03.14")
+    # 다음 페이지 기록 도중 중단되어 마지막 줄이 잘림
+    with open(tmp_path / "crawler_checkpoint.jsonl", 'a', encoding='utf-8') as f:
+        f.write('{"type": "row", "category": "' + CATEGORY + '", "data": {"제목": "d"')
+
+    resumed = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    state = resumed.data[CATEGORY]
+    assert [row_data["제목"] for row_data in state["data"]] == ["a", "b", "c"]
+    assert state["last_page"] == 3
+    assert state["high_water"] == "25.03.14"
+    assert resumed.log_damaged
+    assert resumed.seen_keys[CATEGORY] == {make_row(title)["PDF"] for title in ("a", "b", "c")}
+
+    # 손상된 로그는 바로 스냅샷으로 압축되어 잘린 줄 뒤에 이어 쓰지 않음
+    assert (tmp_path / "crawler_checkpoint.jsonl").read_text(encoding='utf-8') == ""
+    snapshot = json.loads((tmp_path / "crawler_checkpoint.json").read_text(encoding='utf-8'))
+    assert [row_data["제목"] for row_data in snapshot[CATEGORY]["data"]] == ["a", "b", "c"]
+
+
+def test_checkpoint_compaction_overlapping_log_is_not_duplicated(main_crawl, tmp_path):
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    crawler.compact_every = 2
+    crawler.commit_page(CATEGORY, [make_row("a")], 2)
+    crawler.commit_page(CATEGORY, [make_row("b")], 3)
+
+    # 2페이지마다 스냅샷으로 압축되고 로그는 비워짐
+    assert crawler.log_pages == 0
+    assert (tmp_path / "crawler_checkpoint.jsonl").read_text(encoding='utf-8') == ""
+    snapshot = json.loads((tmp_path / "crawler_checkpoint.json").read_text(encoding='utf-8'))
+    assert [row_data["제목"] for row_data in snapshot[CATEGORY]["data"]] == ["a", "b"]
+
+    # 스냅샷 교체 후 로그를 비우기 전에 중단된 경우: 압축된 레코드가 로그에 그대로 남아 있음
+    with open(tmp_path / "crawler_checkpoint.jsonl", 'w', encoding='utf-8') as f:
+        for title, last_page in (("a", 2), ("b", 3)):
+            f.write(json.dumps({"type": "row", "category": CATEGORY, "data": make_row(title)}, ensure_ascii=False) + "\n")
+            f.write(json.dumps({"type": "cursor", "category": CATEGORY, "last_page": last_page}) + "\n")
+
+    resumed = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    state = resumed.data[CATEGORY]
+    assert [row_data["제목"] for row_data in state["data"]] == ["a", "b"]
+    assert state["last_page"] == 3
+    assert not resumed.log_damaged
+
+
+def make_incremental_crawler(main_crawl, pages:dict):
+    """기존 레코드 2개(기준점 25.03.10)가 수집된 상태에서 pages[page_num]을 목록으로 돌려주는 증분 크롤러"""
+    seed = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    seed.commit_page(CATEGORY, [make_row("old1", "25.03.10"), make_row("old2", "25.03.07")], 1,
+                     high_water={"date": "25.03.10", "pdf": make_row("old1")["PDF"]})
+
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1, incremental=True)
+    crawler.known_run_limit = 3
+    crawler.fetched = []
+
+    def fetch_page_rows(category, url, page_num):
+        crawler.fetched.append(page_num)
+        return [dict(row_data) for row_data in pages.get(page_num, [])]
+
+    crawler.fetch_page_rows = fetch_page_rows
+    return crawler
+
+
+def test_incremental_crawl_stops_at_high_water(main_crawl):
+    pages = {
+        1: [make_row("new1", "25.03.14"), make_row("new2", "25.03.13"), make_row("new3", "25.03.12")],
+        # 기준점 PDF와 그보다 오래된 레코드(체크포인트에 없는 레코드 포함)가 이어지면 따라잡은 것으로 판단
+        2: [make_row("new4", "25.03.11"), make_row("old1", "25.03.10"), make_row("old2", "25.03.07"),
+            make_row("older", "25.03.06"), make_row("oldest", "25.03.05")],
+        3: [make_row("never", "25.03.01")],
+    }
+    crawler = make_incremental_crawler(main_crawl, pages)
+    crawler.crawl_category_incremental(CATEGORY, crawler.categories[CATEGORY])
+
+    assert crawler.fetched == [1, 2]
+    state = crawler.data[CATEGORY]
+    assert [row_data["제목"] for row_data in state["data"]] == ["old1", "old2", "new1", "new2", "new3", "new4"]
+    assert state["high_water"] == {"date": "25.03.14", "pdf": make_row("new1")["PDF"]}
+
+    # 기준점은 체크포인트 로그에도 기록되어 재시작 후에도 유지됨
+    resumed = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1)
+    assert resumed.data[CATEGORY]["high_water"] == state["high_water"]
+
+
+def test_incremental_crawl_keeps_high_water_until_caught_up(main_crawl):
+    # 기존 구간에 닿기 전에 목록이 끊기면 빈틈이 남으므로 기준점을 옮기지 않음
+    pages = {1: [make_row("new1", "25.03.14"), make_row("new2", "25.03.13")]}
+    crawler = make_incremental_crawler(main_crawl, pages)
+    crawler.crawl_category_incremental(CATEGORY, crawler.categories[CATEGORY])
+
+    assert crawler.fetched == [1, 2]
+    state = crawler.data[CATEGORY]
+    assert [row_data["제목"] for row_data in state["data"]] == ["old1", "old2", "new1", "new2"]
+    assert state["high_water"] == {"date": "25.03.10", "pdf": make_row("old1")["PDF"]}
+
+
+PDF_BYTES = b"%PDF-1.4\n" + b"0" * 4096 + b"\n%%EOF\n"
+
+
+class FakeResponse:
+    def __init__(self, status_code:int, body:bytes=b"", headers:dict=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size:int):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakePdfServer:
+    """ETag가 일치하면 304, 아니면 200으로 PDF를 돌려주는 가짜 세션"""
+    def __init__(self, body:bytes, etag:str):
+        self.body = body
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, stream=False, timeout=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return FakeResponse(304, headers={"ETag": self.etag})
+        return FakeResponse(200, self.body, {"ETag": self.etag, "Content-Length": str(len(self.body))})
+
+
+def stored_objects(tmp_path) -> list:
+    return sorted(p.name for p in (tmp_path / "pdfs" / "_store" / "objects").rglob("*.pdf"))
+
+
+def test_pdf_conditional_get_reuses_stored_object(main_crawl, tmp_path):
+    server = FakePdfServer(PDF_BYTES, '"v1"')
+    url = make_row("a")["PDF"]
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1, request_rate=1000)
+    crawler.session = server
+
+    first = crawler.download_pdf(url, CATEGORY, "a", "25.03.14")
+    assert server.requests == [{}]
+    assert stored_objects(tmp_path) == [f"{first['PDF_sha256']}.pdf"]
+    assert (tmp_path / first["PDF_local_path"]).read_bytes() == PDF_BYTES
+
+    # 재시작 후에도 index.jsonl의 ETag로 조건부 요청을 보내고, 304면 저장된 객체를 그대로 사용
+    resumed = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1, request_rate=1000)
+    resumed.session = server
+    second = resumed.download_pdf(url, CATEGORY, "a", "25.03.14")
+    assert server.requests[-1] == {"If-None-Match": '"v1"'}
+    assert second == first
+    assert stored_objects(tmp_path) == [f"{first['PDF_sha256']}.pdf"]
+    # 변경 없는 매핑은 인덱스에 다시 기록하지 않음
+    assert len((tmp_path / "pdfs" / "_store" / "index.jsonl").read_text(encoding='utf-8').splitlines()) == 1
+
+
+def test_pdf_damaged_store_object_is_downloaded_again(main_crawl, tmp_path):
+    server = FakePdfServer(PDF_BYTES, '"v1"')
+    url = make_row("a")["PDF"]
+    crawler = main_crawl.NaverPaySecuritiesCrawler(categories=[CATEGORY], download_workers=1, request_rate=1000)
+    crawler.session = server
+    first = crawler.download_pdf(url, CATEGORY, "a", "25.03.14")
+
+    # 저장소 객체가 잘려 있으면 304로 재사용하지 않고 조건 없이 다시 받음
+    object_path = crawler.pdf_store.object_path(first["PDF_sha256"])
+    with open(object_path, 'r+b') as f:
+        f.truncate(100)
+    second = crawler.download_pdf(url, CATEGORY, "a", "25.03.14")
+    assert server.requests == [{}, {}]
+    assert second == first
+    assert crawler.is_complete_pdf(object_path)
+    # 잘린 객체에 하드링크되어 있던 카테고리 폴더 경로도 새 객체로 다시 연결됨
+    assert (tmp_path / second["PDF_local_path"]).read_bytes() == PDF_BYTES
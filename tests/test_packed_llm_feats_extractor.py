@@ -0,0 +1,62 @@
+import json
+import threading
+
+from google.genai import types
+from PIL import Image
+
+from stock_report_insight_modules import LLMTelemetry, PackedLLMFeatsExtractor
+
+
+class FakeModels:
+    def __init__(self, calls:list):
+        self.calls = calls
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents, config=None):
+        doc_ids = [c.split(": ")[1] for c in contents if isinstance(c, str) and c.startswith("Document id")]
+        with self.lock:
+            self.calls.append(doc_ids or "single")
+        if doc_ids:
+            # 묶음 응답에서는 target_price를 찾지 못함
+            out = [{"doc_id": doc_id, "ticker": "005930", "target_price": 0} for doc_id in doc_ids]
+        else:
+            out = {"ticker": "005930", "target_price": 90000}
+        return types.GenerateContentResponse.model_validate({"candidates": [{"content": {"parts": [{"text": json.dumps(out)}]}}]})
+
+
+class FakeClientPool:
+    def __init__(self, calls:list):
+        self.models = FakeModels(calls)
+
+    def get(self, api_key:str):
+        return type("Client", (), {"models": self.models})()
+
+
+class StubParser:
+    rules = {"ticker": [], "target_price": []}
+    version = "stub"
+
+    def __call__(self, file_path:str) -> dict:
+        if file_path.endswith("ruled.pdf"):
+            return {"ticker": "000660", "target_price": 150000}
+        if file_path.endswith("0.pdf"):
+            return {"target_price": 95000}
+        return {}
+
+
+def test_packed_path_applies_rules_and_reask(tmp_path):
+    for name in ("0.pdf", "1.pdf", "ruled.pdf"):
+        Image.new("RGB", (20, 20)).save(tmp_path / name)
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    calls = []
+    extractor = PackedLLMFeatsExtractor(str(tmp_path), "gemini", "2.5-flash", "prompt", essential_cols=("ticker", "target_price"),
+                                        client_pool=FakeClientPool(calls), rule_parser=StubParser(), telemetry=LLMTelemetry(None))
+    results = extractor(["0.pdf", "1.pdf", "ruled.pdf", "broken.pdf"])
+
+    assert results[0] == {"ticker": "005930", "target_price": 95000}  # 묶음 응답의 빈 항목을 규칙 값으로 채움
+    assert results[1] == {"ticker": "005930", "target_price": 90000}  # 누락 항목 재질의
+    assert results[2] == {"ticker": "000660", "target_price": 150000}  # 규칙만으로 완료 - 묶음에서 제외
+    assert results[3] == {"ticker": "005930", "target_price": 90000}  # 페이지 수 확인 실패 - 단일 요청
+    assert calls.count(["D1", "D2"]) == 1 and calls.count("single") == 2
+    assert extractor.rule_hits == 1 and extractor.reask_calls == 1
@@ -0,0 +1,79 @@
+import pytest
+
+from stock_report_insight_modules import ExtractionCache, LLMFeatsExtractor, LLMTelemetry, ReportHeaderParser, file_sha256
+
+
+HEADER_KOSPI = """유가증권시장 | 반도체
+삼성전자 (005930)
+NH투자증권 리서치본부 2025.03.14
+투자의견 Buy (유지) 목표주가 95,000원 현재주가(3/13) 72,300원
+연구원 홍길동"""
+
+HEADER_KOSDAQ = """코스닥 | IT부품
+에코프로비엠 (247540.KQ)
+2025년 3월 14일 키움증권
+Target Price 180,000 Rating Outperform"""
+
+
+@pytest.mark.parametrize("text, expected", [
+    (HEADER_KOSPI, {"firm": "NH투자증권", "ticker": "005930", "stock": "삼성전자", "target_price": 95000, "current_price": 72300,
+                    "investment_opinion": "Buy", "published_date": "2025-03-14", "author": "홍길동"}),
+    (HEADER_KOSDAQ, {"firm": "키움증권", "ticker": "247540", "stock": "에코프로비엠", "target_price": 180000,
+                     "investment_opinion": "Buy", "published_date": "2025-03-14"}),
+])
+def test_parse_header(text, expected):
+    assert ReportHeaderParser().parse(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "유가증권시장 상장 종목 삼성전자 (005930)",
+    "코스닥증권시장 에코프로비엠 (247540)",
+    "한국거래소 유가증권시장본부",
+])
+def test_market_name_is_not_firm(text):
+    assert "firm" not in ReportHeaderParser().parse(text)
+
+
+class StubParser:
+    rules = {"firm": [], "target_price": []}
+
+    def __call__(self, file_path:str) -> dict:
+        return {"firm": "유가증권", "target_price": 95000}
+
+
+def test_rule_values_do_not_override_llm_values(tmp_path):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+    extractor = LLMFeatsExtractor(str(tmp_path), "gemini", "2.5-flash", "prompt", essential_cols=("firm", "target_price", "ticker"),
+                                  rule_parser=StubParser(), telemetry=LLMTelemetry(None))
+    extractor.model_map["gemini"] = lambda *args, **kwargs: {"firm": "NH투자증권", "target_price": 0, "ticker": "005930"}
+
+    # LLM이 찾은 값은 유지하고, 비워 둔 항목만 규칙 값으로 채움
+    assert extractor("a.pdf") == {"firm": "NH투자증권", "target_price": 95000, "ticker": "005930"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("미래에셋증권\n목표주가(12M, 원) 95,000\n현재주가 72,300", {"firm": "미래에셋증권", "target_price": 95000, "current_price": 72300}),
+    ("키움증권 투자의견(6M) BUY 목표주가(12개월) 180,000원", {"firm": "키움증권", "target_price": 180000, "investment_opinion": "Buy"}),
+])
+def test_firm_rules(text, expected):
+    assert ReportHeaderParser().parse(text) == expected
+    # 공통 규칙만으로는 기간 라벨의 숫자(12, 6)에 걸려 값을 찾지 못함
+    assert ReportHeaderParser(firm_rules={}).parse(text) != expected
+
+
+def test_rule_only_result_is_cached_apart_from_llm_results(tmp_path, monkeypatch):
+    (tmp_path / "a.pdf").write_bytes(b"%PDF-1.4")
+    parser = ReportHeaderParser()
+    monkeypatch.setattr("stock_report_insight_modules.extract_page_text", lambda file_path, page_index=0: HEADER_KOSPI)
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+    extractor = LLMFeatsExtractor(str(tmp_path), "gemini", "2.5-flash", "prompt", essential_cols=("ticker", "target_price"),
+                                  cache=cache, rule_parser=parser, telemetry=LLMTelemetry(None))
+    calls = []
+    extractor.model_map["gemini"] = lambda *args, **kwargs: calls.append(args) or {"ticker": "005930", "target_price": 90000}
+
+    assert extractor("a.pdf")["target_price"] == 95000
+    assert not calls
+
+    pdf_hash = file_sha256(str(tmp_path / "a.pdf"))
+    assert cache.get(pdf_hash, "prompt", "gemini", "2.5-flash") is None
+    assert cache.get(pdf_hash, "prompt", "rules", parser.version)["target_price"] == 95000
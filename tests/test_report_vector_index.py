@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+from stock_report_insight_modules import ReportVectorIndex
+
+
+def write_pdf(path, content:bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"%PDF-1.4 " + content)
+    return str(path)
+
+
+def test_same_named_reports_in_different_directories_are_both_indexed(tmp_path):
+    index = ReportVectorIndex(str(tmp_path / "index"))
+    a = write_pdf(tmp_path / "종목분석" / "report.pdf", b"a")
+    b = write_pdf(tmp_path / "산업분석" / "report.pdf", b"b")
+    copy = write_pdf(tmp_path / "copy" / "other.pdf", b"a")
+
+    assert index.add(a, np.eye(2, 4), [(1, 0), (1, 10)]) == 2
+    assert index.add(b, np.eye(2, 4)[::-1], [(1, 0), (2, 0)]) == 2
+    assert index.add(copy, np.eye(2, 4), [(1, 0), (1, 10)]) == 0  # 내용이 같은 리포트는 생략
+
+    hits = index.search(np.array([1.0, 0, 0, 0]), k=2)[0]
+    assert {hit["pdf_file"] for hit in hits} == {a, b}
+
+
+def test_failed_metadata_insert_truncates_vectors(tmp_path):
+    index = ReportVectorIndex(str(tmp_path / "index"))
+    a = write_pdf(tmp_path / "a.pdf", b"a")
+    b = write_pdf(tmp_path / "b.pdf", b"b")
+    c = write_pdf(tmp_path / "c.pdf", b"c")
+    index.add(a, np.eye(1, 4), [(1, 0)])
+
+    with pytest.raises(Exception):
+        index.add(b, np.eye(2, 4), [(object(), 0), (1, 0)])  # 바인딩할 수 없는 값으로 메타데이터 기록 실패
+    assert os.path.getsize(index.vectors_path) == 1 * 4 * 4
+
+    # 이후 추가분의 행 번호와 벡터 위치가 일치
+    index.add(c, np.array([[0, 0, 1.0, 0]]), [(3, 0)])
+    hit = index.search(np.array([0, 0, 1.0, 0]), k=1)[0][0]
+    assert hit["pdf_file"] == c and hit["page"] == 3 and hit["score"] == pytest.approx(1.0)